@@ -49,26 +49,16 @@ def parse_cycle(x):
     return cycle
     
 
-def read_arff(fpath):
-    with open(fpath, 'r') as f:
-        lines = f.readlines()
-    for i,line in enumerate(lines):
-        if line.startswith('@DATA'):
-            i += 1
-            break
+def parse_arff(fpath, d):
+    # convert ARFF metadata (see e1d.io.read_arff) to integer arrays:
     sess,limb     = parse_filename( fpath )
-    a             = np.array([line.strip().split(',')  for line in lines[i:]])
-    if sess==1:  # M6 --- remove last row which containts "?"
-         a        = a[:-1]
-    y             = np.asarray(a[:,:-4], dtype=float)  # dependent variable
-    b             = np.isnan(y).any(axis=1)
-    y,a           = y[~b], a[~b]
-    group,subj    = parse_subj( a[:,101] )
-    affected_limb = parse_affected_limb( a[:,102] ) 
-    trial         = parse_trial( a[:,103] )
-    cycle         = parse_cycle( a[:,104] )
-    sess          = sess * np.asarray([1]*y.shape[0])
-    limb          = limb * np.asarray([1]*y.shape[0])
+    y             = d['y']  # dependent variable
+    group,subj    = parse_subj( d['patients_class'] )
+    affected_limb = parse_affected_limb( d['OAside_class'] ) 
+    trial         = parse_trial( d['trial_class'] )
+    cycle         = parse_cycle( d['cycle_class'] )
+    sess          = sess * np.ones(y.shape[0], dtype=int)
+    limb          = limb * np.ones(y.shape[0], dtype=int)
     d             = dict(y=y, group=group, subj=subj, sess=sess, limb=limb, affected_limb=affected_limb, trial=trial, cycle=cycle)
     return d
 
@@ -84,6 +74,7 @@ def stack_dictionaries( *args ):
 
 
 # read data files:
+nworkers = 1     # number of parallel processes
 dir0    = os.path.join( os.path.dirname(__file__), 'data' )
 fname0  = 'HEA_M0_LHipAngles_X.arff'
 fname1  = 'HEA_M0_RHipAngles_X.arff'
@@ -92,7 +83,9 @@ fname3  = 'HOA_M0_RHipAngles_X.arff'
 fname4  = 'HOA_M6_LHipAngles_X.arff'
 fname5  = 'HOA_M6_RHipAngles_X.arff'
 fnames  = [fname0, fname1, fname2, fname3, fname4, fname5]
-dicts   = [read_arff( os.path.join(dir0, s) )   for s in fnames]
+fpaths  = [os.path.join(dir0, s)   for s in fnames]
+dicts   = e1d.io.read_arff( fpaths, nworkers=nworkers )  # rows with missing values are dropped
+dicts   = [parse_arff(fpath, d)   for fpath,d in zip(fpaths, dicts)]
 d       = stack_dictionaries( *dicts )
 
 
@@ -17,33 +17,15 @@ d       = e1d.io.load_h5( fpathH5 )
 
 
 
-# calculate means:
-usubj   = e1d.util.unique_sorted( d['subj'] )
-m       = []
-subj    = []
-group   = []
-aff     = []
-sess    = []
-limb    = []
-for sb in usubj:
-    for ss in [0,1]:
-        for ll in [0,1]:
-            b  = (d['subj']==sb) & (d['sess']==ss) & (d['limb']==ll)
-            y  = d['y'][b]
-            if y.shape[0] > 1:
-                m.append( y.mean(axis=0) )
-                subj.append( sb )
-                sess.append( ss )
-                limb.append( ll )
-                group.append( d['group'][b][0] )
-                aff.append( d['affected_limb'][b][0] )
-m      = np.vstack(m)
-subj,sess,limb,group,aff = [np.asarray(x)  for x in (subj,sess,limb,group,aff)]
+# calculate means (for subject-session-limb combinations with at least two cycles):
+keys    = dict(subj=d['subj'], sess=d['sess'], limb=d['limb'])
+carry   = dict(group=d['group'], affected_limb=d['affected_limb'])
+m       = e1d.util.group_means(d['y'], keys, min_count=2, carry=carry)
 
 
 
 # save means:
-d      = dict(y=m, subj=subj, sess=sess, limb=limb, group=group, affected_limb=aff)
+d      = {k:m[k]  for k in ('y', 'subj', 'sess', 'limb', 'group', 'affected_limb')}
 fpath1 = os.path.join(dir0, 'means.h5')
 e1d.io.save_h5(fpath1, d)
 
@@ -29,9 +29,9 @@ y1     = np.vstack([d['y'][  (d['subj']==u) & (d['limb']==limb) & (d['sess']==0)
 y2     = np.vstack([d['y'][  (d['subj']==u) & (d['limb']==limb) & (d['sess']==1) ]  for u in oasubj])
 
 
-# calculate residuals:
+# calculate (normalized) residuals:
 y      = y2 - y1
-r      = y - y.mean(axis=0)
+*_,r   = e1d.stats.moments_1sample(y, residuals=True)
 
 
 
@@ -48,6 +48,7 @@ def create_figure():
     ns      = [20, 20,   52, 52,   52, 52]
     designs = ['2sample', '1sample'] * 3
     fwhms   = [21.9, 21.9,   21.9, 21.9,   73.3, 73.3]
+    cvt     = e1d.stats.d_critical_table(ns, dim=1, design=designs, Q=101, fwhm=fwhms)  # proposed baseline scenarios
 
 
 
@@ -59,7 +60,7 @@ def create_figure():
     colors  = plt.cm.hot( np.linspace(0, 1, 11) )[1:-4]
     
     for i,(ax,n,design,fwhm) in enumerate( zip(axs.ravel(), ns, designs, fwhms) ):
-        cv = e1d.stats.d_critical(n, dim=1, design=design, Q=101, fwhm=fwhm)  # proposed baseline scenario
+        cv = cvt[i]
         ax.plot( d, color='k' )
         ax.axhline(0, color='k', ls=':')
     
@@ -2,108 +2,49 @@
 import os
 import numpy as np
 from matplotlib import pyplot as plt
-import rft1d
 import esrot1d as e1d
 
 
-def get_numerical_sf(d, u):
-    d  = np.asarray( d )
-    sf = np.array(   [(d>uu).mean()  for uu in u]   )
-    sf[sf==0] = np.nan
-    return sf
-
-
-
-np.random.seed(0)
-niter  = 10000
-Q      = 101
-fwhm   = 20
-fwhms  = [5, 20, 50]
-N1     = 15
-N2     = 8
-ns1    = [9, 19, 39]  # df:  8, 18, 38
-ns2    = [5, 10, 20]  # df:  8, 18, 38
-u      = np.arange(0, 2.1, 0.2)
-u0     = np.linspace(0, 2, 51)
-
-
-# one-sample 0d
-sf10   = []
-for n in ns1:
-    d  = []
-    for i in range(niter):
-        y  = np.random.randn(n)
-        d.append( e1d.stats.d_1sample(y) )
-    sf10.append( get_numerical_sf(d, u) )
-sf10    = np.array( sf10 )
-# sf10_an = np.array([[e1d.stats.d2p_1sample_0d(uu,nn) for uu in u0]  for nn in ns1])
-sf10_an = np.array([[e1d.stats.d2p(uu,nn, dim=0, design='1sample') for uu in u0]  for nn in ns1])
-
-
-
-# one-sample 1d (constant FWHM)
-sf11n = []
-for n in ns1:
-    d  = []
-    for i in range(niter):
-        y  = rft1d.randn1d(n, Q, fwhm)
-        d.append( e1d.stats.d_1sample(y).max() )
-    sf11n.append( get_numerical_sf(d, u) )
-sf11n    = np.array( sf11n )
-sf11n_an = np.array([[e1d.stats.d2p(uu,nn, dim=1, design='1sample', Q=Q,fwhm=fwhm) for uu in u0]  for nn in ns1])
-
-
-# one-sample 1d (constant n)
-sf11w = []
-for w in fwhms:
-    d  = []
-    for i in range(niter):
-        y  = rft1d.randn1d(N1, Q, w)
-        d.append( e1d.stats.d_1sample(y).max() )
-    sf11w.append( get_numerical_sf(d, u) )
-sf11w    = np.array( sf11w )
-sf11w_an = np.array([[e1d.stats.d2p(uu,N1,dim=1, design='1sample', Q=Q, fwhm=w) for uu in u0]  for w in fwhms])
-
-
-
-
-# two-sample 0d
-sf20   = []
-for n in ns2:
-    d  = []
-    for i in range(niter):
-        y0  = np.random.randn(n)
-        y1  = np.random.randn(n)
-        d.append( e1d.stats.d_2sample(y0, y1) )
-    sf20.append( get_numerical_sf(d, u) )
-sf20    = np.array( sf20 )
-sf20_an = np.array([[e1d.stats.d2p(uu,nn*2, dim=0, design='2sample') for uu in u0]  for nn in ns2])
-
-
-# two-sample 1d  (constant FWHM)
-sf21n  = []
-for n in ns2:
-    d  = []
-    for i in range(niter):
-        y0  = rft1d.randn1d(n, Q, fwhm)
-        y1  = rft1d.randn1d(n, Q, fwhm)
-        d.append( e1d.stats.d_2sample(y0, y1).max() )
-    sf21n.append( get_numerical_sf(d, u) )
-sf21n    = np.array( sf21n )
-sf21n_an = np.array([[e1d.stats.d2p(uu,nn*2, dim=1, design='2sample', Q=Q, fwhm=fwhm) for uu in u0]  for nn in ns2])
-
-
-# two-sample 1d  (constant n)
-sf21w  = []
-for w in fwhms:
-    d  = []
-    for i in range(niter):
-        y0  = rft1d.randn1d(N2, Q, w)
-        y1  = rft1d.randn1d(N2, Q, w)
-        d.append( e1d.stats.d_2sample(y0, y1).max() )
-    sf21w.append( get_numerical_sf(d, u) )
-sf21w    = np.array( sf21w )
-sf21w_an = np.array([[e1d.stats.d2p(uu,N2*2, dim=1, design='2sample', Q=Q, fwhm=w) for uu in u0]  for w in fwhms])
+seed     = 0
+nworkers = 1     # number of parallel processes;  results are identical for any value
+niter    = 10000
+Q        = 101
+fwhm     = 20
+fwhms    = [5, 20, 50]
+N1       = 15
+N2       = 8
+ns1      = [9, 19, 39]  # df:  8, 18, 38
+ns2      = [5, 10, 20]  # df:  8, 18, 38
+u        = np.arange(0, 2.1, 0.2)
+u0       = np.linspace(0, 2, 51)
+wcol     = np.array(fwhms)[:,None]  # FWHM values as a column (for broadcasting against u0)
+fpathCK  = None  # optional HDF5 checkpoint file (to resume interrupted runs)
+
+
+
+# simulate:
+s1       = dict(niter=niter, design='1sample')
+s2       = dict(niter=niter, design='2sample')
+scenarios  = [dict(s1, n=n, dim=0)  for n in ns1]                           # one-sample 0d
+scenarios += [dict(s1, n=n, dim=1, Q=Q, fwhm=fwhm)  for n in ns1]           # one-sample 1d (constant FWHM)
+scenarios += [dict(s1, n=N1, dim=1, Q=Q, fwhm=w)  for w in fwhms]           # one-sample 1d (constant n)
+scenarios += [dict(s2, n=2*n, dim=0)  for n in ns2]                         # two-sample 0d
+scenarios += [dict(s2, n=2*n, dim=1, Q=Q, fwhm=fwhm)  for n in ns2]         # two-sample 1d (constant FWHM)
+scenarios += [dict(s2, n=2*N2, dim=1, Q=Q, fwhm=w)  for w in fwhms]         # two-sample 1d (constant n)
+dmax     = e1d.sim.run_scenarios(scenarios, seed=seed, nworkers=nworkers, fpath=fpathCK)
+sf       = np.array([e1d.sim.empirical_sf(d, u)  for d in dmax])
+sf[sf==0] = np.nan
+sf10, sf11n, sf11w, sf20, sf21n, sf21w = sf.reshape(6, 3, u.size)
+
+
+
+# analytical:
+sf10_an  = e1d.stats.d2p(u0, ns1, dim=0, design='1sample')
+sf11n_an = e1d.stats.d2p(u0, ns1, dim=1, design='1sample', Q=Q, fwhm=fwhm)
+sf11w_an = e1d.stats.d2p(u0, N1, dim=1, design='1sample', Q=Q, fwhm=wcol)
+sf20_an  = e1d.stats.d2p(u0, 2*np.array(ns2), dim=0, design='2sample')
+sf21n_an = e1d.stats.d2p(u0, 2*np.array(ns2), dim=1, design='2sample', Q=Q, fwhm=fwhm)
+sf21w_an = e1d.stats.d2p(u0, 2*N2, dim=1, design='2sample', Q=Q, fwhm=wcol)
 
 
 
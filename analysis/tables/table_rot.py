@@ -5,9 +5,7 @@ import esrot1d as e1d
 # sample size to make "Large" effect significant at alpha=0.05
 baseline = e1d.BaselineScenario()
 d_large  = baseline['Large']  # large: 0.8
-n        = 4  # initial sample size
-while e1d.stats.d2p(d_large, n, dim=0, design='2sample') > 0.05:
-    n += 2
+n        = e1d.stats.n_min(d_large, alpha=0.05, dim=0, design='2sample')
 print( f'\nMinimum sample size for significant LARGE effect: {n}\n\n' )
 
 
@@ -0,0 +1,142 @@
+
+'''
+Performance benchmarks for stats, smoothness and simulation hot paths
+
+Usage:
+
+    python benchmarks/bench.py                    # run, save results and compare with the baseline
+    python benchmarks/bench.py --save-baseline    # run and save the results as the new baseline
+    python benchmarks/bench.py -k d2p -k p2d      # run only benchmarks whose names contain "d2p" or "p2d"
+
+Results (best time per call, in seconds) are written to "results.json";
+the baseline is stored in "baseline.json". The script exits with status 1
+if any benchmark is slower than the baseline by more than the threshold
+ratio (default: 1.5). Baselines are machine-specific;  regenerate the
+baseline with --save-baseline when changing machines.
+'''
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import numpy as np
+import esrot1d as e1d
+
+
+dir0          = os.path.dirname( os.path.abspath(__file__) )
+fpath_results = os.path.join(dir0, 'results.json')
+fpath_base    = os.path.join(dir0, 'baseline.json')
+
+
+
+# ---- benchmarks ----------
+# each benchmark is a zero-argument function;  inputs are created once, outside the timed call
+
+def _benchmarks():
+    rng    = np.random.default_rng(0)
+    d      = np.linspace(0, 2, 10000)
+    p      = np.linspace(1e-4, 0.5, 1000)
+    t      = np.linspace(0, 5, 10000)
+    e      = {Q:rng.standard_normal((20, Q)).cumsum(axis=1)  for Q in (101, 1001, 10001)}
+    eb     = rng.standard_normal((100, 20, 101)).cumsum(axis=-1)
+    s      = e1d.stats
+    b      = dict()
+    b['d2p_scalar_0d']      = lambda: s.d2p(0.5, 10, dim=0)
+    b['d2p_scalar_1d']      = lambda: s.d2p(0.5, 10, dim=1, Q=101, fwhm=20)
+    b['d2p_array_0d']       = lambda: s.d2p(d, 10, dim=0)
+    b['d2p_array_1d']       = lambda: s.d2p(d, 10, dim=1, Q=101, fwhm=20)
+    b['p2d_scalar_0d']      = lambda: s.p2d(0.05, 10, dim=0)
+    b['p2d_scalar_1d']      = lambda: s.p2d(0.05, 10, dim=1, Q=101, fwhm=20)
+    b['p2d_array_1d']       = lambda: s.p2d(p, 10, dim=1, Q=101, fwhm=20)
+    b['p2d_array_1d_table'] = lambda: s.p2d(p, 10, dim=1, Q=101, fwhm=20, method='table')
+    b['p2t_array_0d']       = lambda: s.p2t(p, 9, dim=0)
+    b['p2t_array_1d']       = lambda: s.p2t(p, 9, dim=1, Q=101, fwhm=20)
+    b['t2p_array_0d']       = lambda: s.t2p(t, 9, dim=0)
+    b['t2p_array_1d']       = lambda: s.t2p(t, 9, dim=1, Q=101, fwhm=20)
+    b['d_critical_grid']    = lambda: [s.d_critical(n, dim=1, design='2sample', Q=101, fwhm=w, cache=False)  for n in range(6, 51, 4)  for w in (5, 10, 20, 40)]
+    for Q,ee in e.items():
+        b[f'estimate_lkc_{Q}']  = lambda ee=ee: e1d.smoothness.estimate_lkc(ee)
+    b['estimate_lkc_batch'] = lambda: e1d.smoothness.estimate_lkc(eb)
+    b['sim_dmax_0d']        = lambda: e1d.sim.dmax(10000, 10, dim=0, rng=0)
+    b['sim_dmax_1d']        = lambda: e1d.sim.dmax(1000, 10, dim=1, Q=101, fwhm=20, rng=0)
+    return b
+
+
+def timeit(f, repeat=5, min_time=0.05):
+    # best time per call over "repeat" rounds;  each round runs for at least "min_time" seconds
+    f()   # warm-up (lazy imports, caches)
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for i in range(number):
+            f()
+        t  = time.perf_counter() - t0
+        if t >= min_time:
+            break
+        number *= 2
+    times  = [t / number]
+    for i in range(repeat-1):
+        t0 = time.perf_counter()
+        for i in range(number):
+            f()
+        times.append( (time.perf_counter() - t0) / number )
+    return min(times)
+
+
+def run(names=None):
+    b = _benchmarks()
+    if names:
+        b = {k:v  for k,v in b.items()  if any(s in k for s in names)}
+    return {k:timeit(f)  for k,f in b.items()}
+
+
+def compare(results, baseline, threshold=1.5):
+    # returns a list of (name, time, baseline time, ratio, regressed)
+    rows = []
+    for k,t in results.items():
+        if k in baseline:
+            r = t / baseline[k]
+            rows.append( (k, t, baseline[k], r, r > threshold) )
+    return rows
+
+
+def save(fpath, results):
+    meta = dict(python=platform.python_version(), numpy=np.__version__, machine=platform.machine(), processor=platform.processor(), time=time.strftime('%Y-%m-%dT%H:%M:%S'))
+    with open(fpath, 'w') as f:
+        json.dump( dict(meta=meta, results=results), f, indent=2, sort_keys=True )
+
+
+def load(fpath):
+    with open(fpath, 'r') as f:
+        return json.load(f)['results']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='esrot1d performance benchmarks')
+    parser.add_argument('-k', dest='names', action='append', help='run only benchmarks whose names contain this string')
+    parser.add_argument('--threshold', type=float, default=1.5, help='maximum allowed ratio: time / baseline time')
+    parser.add_argument('--save-baseline', action='store_true', help='save the results as the new baseline')
+    parser.add_argument('--results', default=fpath_results, help='results file (JSON)')
+    parser.add_argument('--baseline', default=fpath_base, help='baseline file (JSON)')
+    args   = parser.parse_args(argv)
+    res    = run(args.names)
+    save(args.baseline if args.save_baseline else args.results, res)
+    if args.save_baseline or not os.path.exists(args.baseline):
+        for k,t in res.items():
+            print( f'{k:<22} {t*1e3:10.4f} ms' )
+        return 0
+    rows   = compare(res, load(args.baseline), args.threshold)
+    print( f'{"benchmark":<22} {"time (ms)":>10} {"base (ms)":>10} {"ratio":>7}' )
+    for k,t,t0,r,regressed in rows:
+        print( f'{k:<22} {t*1e3:10.4f} {t0*1e3:10.4f} {r:7.2f}' + ('  REGRESSION' if regressed else '') )
+    nfail  = sum(row[-1] for row in rows)
+    if nfail > 0:
+        print( f'{nfail} benchmark(s) exceeded the regression threshold ({args.threshold})' )
+    return int(nfail > 0)
+
+
+
+if __name__ == '__main__':
+    sys.exit( main() )
@@ -1,9 +1,27 @@
 
-from . baseline import BaselineScenario
-from . import io
-from . import smoothness
-from . import stats
-from . import util
+'''
+Submodules are imported lazily (PEP 562) on first attribute access,
+so that "import esrot1d" does not import numpy, scipy, h5py or rft1d.
+'''
+
+_submodules = ('baseline', 'dec', 'instrument', 'io', 'lazy', 'perm', 'pipeline', 'sim', 'smoothness', 'stats', 'util')
+_attributes = dict(BaselineScenario='baseline', analyze='pipeline')
+
+
+def __getattr__(name):
+    import importlib
+    if name in _submodules:
+        x = importlib.import_module(f'{__name__}.{name}')
+    elif name in _attributes:
+        x = getattr( importlib.import_module(f'{__name__}.{_attributes[name]}'), name )
+    else:
+        raise AttributeError( f'module "{__name__}" has no attribute "{name}"' )
+    globals()[name] = x     # cache:  __getattr__ is not called again for this name
+    return x
+
+def __dir__():
+    return sorted( list(globals().keys()) + list(_submodules) + list(_attributes) )
+
 
 
 import pathlib
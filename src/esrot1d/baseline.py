@@ -5,42 +5,128 @@ Classes for collections of critical d-values and their interpretation labels.
 
 
 import numpy as np
+from collections.abc import Iterable, Mapping
 
 
-class CriticalValues(dict):
+
+def _readonly(x):
+    # contiguous, read-only float array;  already read-only arrays are shared (not copied)
+    if isinstance(x, np.ndarray) and (x.dtype == float) and (x.ndim == 1) and x.flags.c_contiguous and not x.flags.writeable:
+        return x
+    x = np.array(x, dtype=float).ravel()
+    x.flags.writeable = False
+    return x
+
+
+_default_labels = ('Very small', 'Small', 'Medium', 'Large', 'Very large', 'Huge')
+
+
+
+class CriticalValues(Mapping):
+    '''
+    Immutable mapping of interpretation labels to critical d-values
+
+    Instances store only references to:  a contiguous (read-only) array of
+    d-values, and a p-value array and label tuple which are shared between
+    all instances created from the same baseline (or CriticalValuesTable).
+
+        cv['Large']            # critical d-value for one label
+        cv.d, cv.p, cv.labels  # d-values, p-values, labels
+    '''
+    __slots__ = ('_d', '_p', '_labels')
+
     def __init__(self, d, p, labels=None):
-        self.d = np.asarray(d, dtype=float).flatten()
-        self.p = np.asarray(p, dtype=float).flatten()
-        self.labels = self._init_labels( labels, self.d, self.p )
-        super().__init__( zip(self.labels, self.d) )
-        
-        
+        d = np.array(d, dtype=float).ravel()
+        d.flags.writeable = False
+        p = _readonly(p)
+        self._init( d, p, self._init_labels( labels, d, p ) )
+
+    def _init(self, d, p, labels):
+        object.__setattr__(self, '_d', d)
+        object.__setattr__(self, '_p', p)
+        object.__setattr__(self, '_labels', labels)
+
+    @classmethod
+    def _new(cls, d, p, labels):
+        # fast constructor (no copying or validation);  d and p must be read-only arrays and labels a tuple
+        self = object.__new__(cls)
+        CriticalValues._init(self, d, p, labels)
+        return self
+
+    def __contains__(self, key):
+        return key in self._labels
+
+    def __delattr__(self, name):
+        raise AttributeError( f'{self.__class__.__name__} objects are immutable' )
+
+    def __eq__(self, other):
+        if isinstance(other, CriticalValues):
+            return (self._labels == other._labels) and np.array_equal(self._d, other._d)
+        return dict(self.items()) == other
+
+    __hash__ = None
+
+    def __getitem__(self, key):
+        try:
+            return self._d[ self._labels.index(key) ]
+        except ValueError:
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        return iter(self._labels)
+
+    def __len__(self):
+        return len(self._labels)
+
+    def __reduce__(self):
+        return _unpickle, (self.__class__, self._d, self._p, self._labels)
+
     def __repr__(self):
         s = f'{self.__class__.__name__}\n'
         for (k,v),pp in zip( self.items(), self.p):
             s += f'{k:>12} = {self._v2str(v)}  (p={pp:0.05})\n'
         return s
-    
+
+    def __setattr__(self, name, value):
+        raise AttributeError( f'{self.__class__.__name__} objects are immutable' )
+
+    @property
+    def d(self):
+        return self._d
+
+    @property
+    def labels(self):
+        return self._labels
+
+    @property
+    def p(self):
+        return self._p
+
     @staticmethod
     def _init_labels(labels, d, p):
         if labels is None:
             assert d.size==6, f'\nIf no labels are specified, d must have size 6.\nActual size of d: {d.size}'
             assert p.size==6, f'\nIf no labels are specified, p must have size 6.\nActual size of p: {p.size}'
-            labels = ['Very small', 'Small', 'Medium', 'Large', 'Very large', 'Huge']
+            labels = _default_labels
         else:
-            from collections.abc import Iterable
             assert isinstance(labels, Iterable), '\n"labels" must be a list of strings'
-            labels = list(labels)
-            assert np.all([isinstance(x,str) for x in labels]), '\n"labels" must be a list of strings'
+            labels = labels if isinstance(labels, tuple) else tuple(labels)   # (tuples are shared, not copied)
+            assert all(isinstance(x,str) for x in labels), '\n"labels" must be a list of strings'
             n = len(labels)
             assert d.size==n, f'\nThere are {n} labels, so d must have size {n}.\nActual size of d: {d.size}'
             assert p.size==n, f'\nThere are {n} labels, so p must have size {n}.\nActual size of p: {p.size}'
         return labels
-    
+
     @staticmethod
     def _v2str(x):
         return '< 0.001' if ( x < 0.001) else f'{x:0.3f}'
-        
+
+    def items(self):
+        return list( zip( self._labels, self._d ) )
+
+    def keys(self):
+        return self._labels
+
     def plot_hlines(self, ax, ymax=None, colors=None, textx=0.8):
         if colors is None:
             import matplotlib.pyplot as plt
@@ -50,12 +136,81 @@ class CriticalValues(dict):
                 ax.axhline(value, color=c, ls='-', zorder=0)
                 bbox = dict(facecolor='w', edgecolor="0.5", pad=2, alpha=0.6)
                 ax.text( textx, value+0.01, key, color=c, bbox=bbox, size=12 )
-    
+
     def toarray(self):
-        return self.d.copy()
-        
+        return self._d.copy()
+
     def tolist(self):
-        return list( zip( self.keys(), self.values() ) )
+        return self.items()
+
+    def values(self):
+        return self._d
+
+
+def _unpickle(cls, d, p, labels):
+    return cls._new( _readonly(d), _readonly(p), labels )
+
+
+
+class CriticalValuesTable(object):
+    '''
+    Critical d-values for multiple scenarios (rows) and interpretation labels (columns)
+
+    Data are stored in a structured array with fields:  n, dim, design, Q, fwhm
+    (NaN for dim=0 scenarios) and d (one value per label).
+
+        table['Large']         # critical d-values for one label (all scenarios)
+        table[i]               # CriticalValues for scenario i
+        table[i0:i1]           # sub-table
+        table.lookup(n, design='2sample', dim=1, Q=101, fwhm=20)   # CriticalValues for one scenario
+    '''
+    def __init__(self, data, p, labels):
+        self.data   = data
+        self.p      = _readonly(p)
+        self.labels = tuple(labels)
+        self._index = None
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.data['d'][:, self.labels.index(key)]
+        if np.ndim(key) == 0 and not isinstance(key, slice):
+            d = np.array( self.data['d'][key] )
+            d.flags.writeable = False
+            return CriticalValues._new( d, self.p, self.labels )
+        return CriticalValuesTable( self.data[key], self.p, self.labels )
+
+    def __len__(self):
+        return self.data.size
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({len(self)} scenarios x {len(self.labels)} labels)'
+
+    @staticmethod
+    def _key(n, dim, design, Q, fwhm):
+        n  = int(n) if float(n).is_integer() else float(n)
+        if (dim == 0) or (Q is None) or np.isnan(Q):
+            Q,fwhm = None, None
+        else:
+            Q,fwhm = float(Q), float(fwhm)
+        return n, int(dim), str(design), Q, fwhm
+
+    @property
+    def d(self):
+        return self.data['d']
+
+    def index(self, n, design='1sample', dim=0, Q=None, fwhm=None):
+        if self._index is None:
+            x           = self.data
+            keys        = zip(x['n'].tolist(), x['dim'].tolist(), x['design'].tolist(), x['Q'].tolist(), x['fwhm'].tolist())
+            self._index = {self._key(*k):i  for i,k in enumerate(keys)}
+        return self._index[ self._key(n, dim, design, Q, fwhm) ]
+
+    def lookup(self, n, design='1sample', dim=0, Q=None, fwhm=None):
+        return self[ self.index(n, design, dim, Q, fwhm) ]
+
+    def tolist(self):
+        return [self[i]  for i in range(len(self))]
+
 
 
 class BaselineScenario(CriticalValues):
@@ -86,10 +241,14 @@ class BaselineScenario(CriticalValues):
         p = stats.t.sf(t, n-2)
     '''
 
+    __slots__ = ()
+
+    _d0 = _readonly( [0.01, 0.2, 0.5, 0.8, 1.2, 2.0] )
+    _p0 = _readonly( [0.4912, 0.33003, 0.13913, 0.045241, 0.0075904, 0.00014728] )  # pre-calculated for this baseline scenario (5 significant digits)
+
     def __init__(self, params=None):
         if params is None:
-            d = [0.01, 0.2, 0.5, 0.8, 1.2, 2.0]
-            p = [0.4912, 0.33003, 0.13913, 0.045241, 0.0075904, 0.00014728]  # pre-calculated for this baseline scenario (5 significant digits)
+            d,p    = self._d0, self._p0   # (shared by all default baseline instances)
             labels = None
         else:
             d,p,labels = params
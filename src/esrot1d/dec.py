@@ -24,33 +24,41 @@ class _check_n_2sample(object):
         self.f = f
 
     def __call__(self, d, n):
-        if n%2 !=0:
+        if np.any( np.asarray(n) % 2 != 0 ):
             raise ValueError( f'Unsupported sample size: n = {n}. If just one sample size value is provided for a 2-sample design it must represent the total sample size and thus be divisible by 2.')
         return self.f(d, n)
 
 
 
 class _nd_vectorize(object):
+    '''
+    Evaluate an array-native function once on broadcast input arrays.
+
+    The first two arguments (a, b) are combined as a grid with shape
+    (b.shape + a.shape), so that rows correspond to b and columns to a.
+    All other array-valued arguments (e.g. Q, fwhm) are broadcast against
+    that grid. A float is returned if all arguments are scalars.
+    '''
     def __init__(self, f):
         self.f = f
 
+    @staticmethod
+    def _isarray(x):
+        return (x is not None) and (not isinstance(x, str)) and (np.ndim(x) > 0)
+
     def __call__(self, a, b, *args, **kwargs):
-        from collections.abc import Iterable
-        ia  = isinstance(a, Iterable)
-        ib  = isinstance(b, Iterable)
-        if ia:
-            a = np.ravel(a)
-        if ib:
-            b = np.ravel(b)
-        
-        if ia and ib:
-            x = np.array(  [[self.f(aa, bb, *args, **kwargs)  for aa in a] for bb in b]  )
-        elif ia:
-            x = np.array(  [self.f(aa, b, *args, **kwargs)  for aa in a]  )
-        elif ib:
-            x = np.array(  [self.f(a, bb, *args, **kwargs)  for bb in b]  )
-        else:
-            x = float( self.f(a, b, *args, **kwargs) )
+        a,b    = np.asarray(a), np.asarray(b)
+        if (a.ndim > 0) and (b.ndim > 0):
+            b  = b.reshape( b.shape + (1,)*a.ndim )
+        args   = [np.asarray(x) if self._isarray(x) else x  for x in args]
+        kwargs = {k:(np.asarray(x) if self._isarray(x) else x)  for k,x in kwargs.items()}
+        shapes = [np.shape(x)  for x in [a, b, *args, *kwargs.values()]  if self._isarray(x)]
+        x      = np.asarray( self.f(a, b, *args, **kwargs), dtype=float )
+        if len(shapes) == 0:
+            return float( x )
+        shape  = np.broadcast_shapes( *shapes )
+        if x.shape != shape:
+            x  = np.broadcast_to(x, shape).copy()
         return x
 
 
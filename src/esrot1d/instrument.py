@@ -0,0 +1,201 @@
+
+'''
+Opt-in instrumentation of hot-path functions
+
+When enabled, calls to the esrot1d.stats conversion functions (d2t, t2d, d2p,
+p2d, p2t, t2p), d_critical and smoothness.estimate_* are recorded, as are calls to
+the internal functions which dominate their cost, so that time can be attributed
+to RFT survival function / inversion work ("stats.rft.sf", "stats.rft.isf") versus
+t distribution evaluation ("stats.tdist.sf", "stats.tdist.isf"):
+
+* call counts
+* element counts (number of output elements;  number of input elements for smoothness estimates)
+* cumulative and percentile (50, 90, 99) latencies
+* peak (traced) memory, if memory=True;  recorded for outermost instrumented calls only
+
+Instrumentation can be enabled using an environment variable (before import):
+
+    ESROT1D_INSTRUMENT=1            # timing only
+    ESROT1D_INSTRUMENT=memory       # timing and memory (slower;  uses tracemalloc)
+    ESROT1D_INSTRUMENT_OUTPUT=a.json   # optional:  write results to a JSON file at exit
+
+or using a context manager:
+
+    import esrot1d as e1d
+    with e1d.instrument.record() as rec:
+        e1d.stats.d_critical(20, dim=1, Q=101, fwhm=20)
+    print( rec.summary() )
+    rec.to_json('results.json')
+
+When disabled, instrumented functions incur only a flag check per call.
+'''
+
+
+import os
+import time
+import json
+import threading
+
+
+
+class Recorder(object):
+    def __init__(self):
+        self.enabled   = False
+        self.memory    = False
+        self._local    = threading.local()
+        self._lock     = threading.Lock()
+        self._tracemalloc_started = False
+        self.reset()
+
+    def __repr__(self):
+        s  = f'{self.__class__.__name__}(enabled={self.enabled}, memory={self.memory})\n'
+        for k,v in self.summary().items():
+            s += f'  {k:<26} calls={v["calls"]:<8} elements={v["elements"]:<10} total={v["total_time"]:.6f} s\n'
+        return s
+
+    def _add(self, name, dt, nelements, peak):
+        with self._lock:
+            r = self._records.setdefault( name, dict(times=[], elements=0, peak_memory=None) )
+            r['times'].append( dt )
+            r['elements'] += nelements
+            if peak is not None:
+                r['peak_memory'] = peak if (r['peak_memory'] is None) else max(r['peak_memory'], peak)
+
+    def _depth(self, increment):
+        d = getattr(self._local, 'depth', 0) + increment
+        self._local.depth = d
+        return d
+
+    def enable(self, memory=False):
+        self.enabled  = True
+        self.memory   = bool(memory)
+        if self.memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._tracemalloc_started = True
+
+    def disable(self):
+        if self._tracemalloc_started:
+            import tracemalloc
+            tracemalloc.stop()
+            self._tracemalloc_started = False
+        self.enabled  = False
+        self.memory   = False
+
+    def reset(self):
+        self._records = dict()
+
+    def summary(self):
+        import numpy as np
+        d = dict()
+        for name,r in sorted( self._records.items() ):
+            t   = np.asarray( r['times'] )
+            p50,p90,p99 = np.percentile(t, [50, 90, 99])
+            d[name] = dict(calls=int(t.size), elements=int(r['elements']), total_time=float(t.sum()), mean_time=float(t.mean()), p50_time=float(p50), p90_time=float(p90), p99_time=float(p99), max_time=float(t.max()), peak_memory=r['peak_memory'])
+        return d
+
+    def to_json(self, fpath=None):
+        s = json.dumps( self.summary(), indent=2 )
+        if fpath is not None:
+            with open(fpath, 'w') as f:
+                f.write( s )
+        return s
+
+
+
+class _instrumented(object):
+    '''
+    Record calls to a function when the module-level recorder is enabled
+    '''
+    def __init__(self, name, count='output'):
+        self.name  = name
+        self.count = count
+
+    def __call__(self, f):
+        import functools
+        name,count = self.name, self.count
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            if not recorder.enabled:
+                return f(*args, **kwargs)
+            return _call(f, name, count, args, kwargs)
+        return wrapper
+
+
+def _size(x):
+    if hasattr(x, 'size'):
+        return int(x.size)
+    return len(x) if hasattr(x, '__len__') else 1
+
+def _call(f, name, count, args, kwargs):
+    memory     = recorder.memory and (recorder._depth(+1) == 1)
+    if recorder.memory and not memory:
+        recorder._depth(-1)
+    if memory:
+        import tracemalloc
+        m0     = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    t0         = time.perf_counter()
+    try:
+        x      = f(*args, **kwargs)
+    finally:
+        dt     = time.perf_counter() - t0
+        peak   = None
+        if memory:
+            peak = tracemalloc.get_traced_memory()[1] - m0
+            recorder._depth(-1)
+    n          = _size(x) if (count=='output') else _size(args[0])
+    recorder._add(name, dt, n, peak)
+    return x
+
+
+
+class record(object):
+    '''
+    Context manager:  enable instrumentation (and reset results) within a block
+    '''
+    def __init__(self, memory=False, reset=True):
+        self.memory = memory
+        self.reset  = reset
+
+    def __enter__(self):
+        self._state = recorder.enabled, recorder.memory
+        if self.reset:
+            recorder.reset()
+        recorder.enable(memory=self.memory)
+        return recorder
+
+    def __exit__(self, *args):
+        enabled,memory = self._state
+        recorder.disable()
+        if enabled:
+            recorder.enable(memory=memory)
+
+
+
+def enable(memory=False):
+    recorder.enable(memory=memory)
+
+def disable():
+    recorder.disable()
+
+def reset():
+    recorder.reset()
+
+def summary():
+    return recorder.summary()
+
+def to_json(fpath=None):
+    return recorder.to_json(fpath)
+
+
+
+recorder = Recorder()
+
+_env     = os.environ.get('ESROT1D_INSTRUMENT', '').strip().lower()
+if _env not in ('', '0', 'false', 'no', 'off'):
+    recorder.enable( memory=(_env=='memory') )
+    if os.environ.get('ESROT1D_INSTRUMENT_OUTPUT'):
+        import atexit
+        atexit.register( recorder.to_json, os.environ['ESROT1D_INSTRUMENT_OUTPUT'] )
@@ -1,20 +1,200 @@
 
 '''
-In/out functions for saving and loading data in HDF5 format
+In/out functions for saving and loading data in HDF5 format,
+and for reading (ARFF) experimental data files
+
+Loading:
+
+* load_h5(fpath)                          # load all datasets into memory
+* load_h5(fpath, keys=['y'], rows=...)    # load selected datasets and rows (axis 0) only
+* load_h5_lazy(fpath)                     # dataset proxies;  data are read only when indexed
+* load_h5_keys(fpath)                     # dataset names
+
+Saving:
+
+* save_h5(fpath, d)                       # save a dictionary of arrays
+* save_h5_item(fpath, key, x)             # add or replace a single dataset
+
+Compression and chunking can be specified for all saving functions:
+
+* compression      : None, 'lzf' or 'gzip' (default: 'gzip')
+* compression_opts : gzip level 0-9 (default: 9)
+* shuffle          : apply the HDF5 shuffle filter before compression (default: False)
+* chunks           : chunk shape, True (automatic) or None (default: None)
+
+Reading ARFF files:
+
+* read_arff(fpath)                        # numeric attributes ("y") and metadata attributes
+* read_arff([fpath0, fpath1], nworkers=4) # multiple files, read concurrently
 '''
 
 
 import numpy as np
 import h5py
 
-def load_h5(fpath):
+
+
+def _dataset_kwargs(x, compression='gzip', compression_opts=9, shuffle=False, chunks=None):
+    if np.ndim(x) == 0:   # compression, shuffle and chunking are not supported for scalars
+        return dict()
+    kwargs = dict(compression=compression, shuffle=shuffle, chunks=chunks)
+    if compression == 'gzip':
+        kwargs['compression_opts'] = compression_opts
+    if not shuffle:
+        kwargs.pop('shuffle')
+    return {k:v  for k,v in kwargs.items()  if v is not None}   # (not "if v":  compression_opts=0 is valid)
+
+def _read(ds, rows=None):
+    if (rows is None) or (ds.ndim == 0):
+        return ds[()]
+    if isinstance(rows, slice):
+        return ds[rows]
+    # HDF5 point selections must be increasing and unique:
+    rows     = np.asarray(rows)
+    if rows.dtype == bool:
+        rows = np.flatnonzero(rows)
+    u,i      = np.unique(rows, return_inverse=True)
+    return ds[u][i.ravel()]
+
+
+
+class H5DatasetProxy(object):
+    '''
+    Lazy reference to a single HDF5 dataset;  data are read (and the file opened)
+    only when the proxy is indexed or converted to an array
+    '''
+    def __init__(self, fpath, key):
+        self.fpath = fpath
+        self.key   = key
+        with h5py.File(fpath, 'r') as f:
+            self.shape = f[key].shape
+            self.dtype = f[key].dtype
+
+    def __array__(self, dtype=None, copy=None):
+        x = self.read()
+        return x if (dtype is None) else x.astype(dtype)
+
+    def __getitem__(self, index):
+        with h5py.File(self.fpath, 'r') as f:
+            return f[self.key][index]
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}("{self.key}", shape={self.shape}, dtype={self.dtype})'
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    def read(self, rows=None):
+        with h5py.File(self.fpath, 'r') as f:
+            return _read(f[self.key], rows)
+
+
+
+def load_h5(fpath, keys=None, rows=None):
     d = dict()
     with h5py.File(fpath, 'r') as f:
-        for k in f.keys():
-            d[k] = np.array(f[k])
+        keys = f.keys() if (keys is None) else keys
+        for k in keys:
+            d[k] = np.asarray( _read(f[k], rows) )
     return d
 
-def save_h5(fpath, d):
+def load_h5_keys(fpath):
+    with h5py.File(fpath, 'r') as f:
+        keys = list( f.keys() )
+    return keys
+
+def load_h5_lazy(fpath, keys=None):
+    keys = load_h5_keys(fpath) if (keys is None) else keys
+    return {k:H5DatasetProxy(fpath, k)  for k in keys}
+
+def save_h5(fpath, d, compression='gzip', compression_opts=9, shuffle=False, chunks=None):
     with h5py.File(fpath, 'w') as f:
         for key in d.keys():
-            f.create_dataset( key, data=d[key], compression='gzip', compression_opts=9 )
\ No newline at end of file
+            kwargs = _dataset_kwargs(d[key], compression, compression_opts, shuffle, chunks)
+            f.create_dataset( key, data=d[key], **kwargs )
+
+def save_h5_item(fpath, key, x, compression='gzip', compression_opts=9, shuffle=False, chunks=None):
+    # add (or replace) a single dataset;  the file is created if it does not exist
+    with h5py.File(fpath, 'a') as f:
+        if key in f:
+            del f[key]
+        kwargs = _dataset_kwargs(x, compression, compression_opts, shuffle, chunks)
+        f.create_dataset( key, data=x, **kwargs )
+
+
+
+# ---- ARFF ----------
+# Rows are streamed and numeric attributes are parsed directly into a
+# preallocated float array (key "y"). All other (nominal or string) attributes
+# are returned as separate arrays, keyed by attribute name, and can optionally
+# be converted to typed arrays using "converters" (a dict of attribute name:
+# function). Missing values ("?") are NaN for numeric attributes;  rows with
+# missing values are dropped when dropna=True (otherwise converters must accept "?").
+# (For nworkers > 1 the converters must be picklable, i.e. module-level functions)
+
+def _arff_header(f):
+    names,numeric = [], []
+    for line in iter(f.readline, ''):   # (readline rather than iteration, so that f.tell remains available)
+        s = line.strip()
+        if s.upper().startswith('@ATTRIBUTE'):
+            name,atype = s.split(None, 2)[1:]
+            names.append( name.strip('\'"') )
+            numeric.append( atype.split()[0].upper() in ('NUMERIC', 'REAL', 'INTEGER') )
+        elif s.upper().startswith('@DATA'):
+            return names, np.array(numeric)
+    raise ValueError( 'Invalid ARFF file: "@DATA" section not found.' )
+
+def _arff_rows(f):
+    for line in f:
+        s = line.strip()
+        if s and not s.startswith('%'):
+            yield s
+
+def _read_arff(fpath, converters=None, dropna=True):
+    from operator import itemgetter
+    converters     = dict() if (converters is None) else converters
+    with open(fpath, 'r') as f:
+        names,numeric = _arff_header(f)
+        i0         = f.tell()
+        nrows      = sum(1 for s in _arff_rows(f))
+        f.seek(i0)
+        inum       = np.flatnonzero(numeric)
+        imeta      = np.flatnonzero(~numeric)
+        getnum     = itemgetter( *inum ) if (inum.size > 1) else (lambda x: [x[i] for i in inum])
+        y          = np.empty( (nrows, inum.size) )
+        meta       = np.empty( (nrows, imeta.size), dtype=object )
+        for i,s in enumerate( _arff_rows(f) ):
+            if s.startswith('{'):
+                raise ValueError( f'Sparse ARFF data are not supported: "{fpath}"' )
+            x      = s.split(',')
+            if len(x) != numeric.size:
+                raise ValueError( f'Invalid ARFF row {i} in "{fpath}": expected {numeric.size} values, found {len(x)}.' )
+            try:
+                y[i]   = getnum(x)
+            except ValueError:   # missing values
+                y[i]   = [np.nan if (v.strip()=='?') else v  for v in getnum(x)]
+            meta[i]    = [x[j].strip().strip('\'"')  for j in imeta]
+    b              = np.ones(nrows, dtype=bool)
+    if dropna:
+        b          = ~np.isnan(y).any(axis=1) & ~(meta == '?').any(axis=1)
+    d              = dict(y=y[b])
+    for j,k in enumerate( imeta ):
+        name       = names[k]
+        x          = meta[b,j]
+        d[name]    = np.array([converters[name](v) for v in x]) if (name in converters) else x.astype(str)
+    return d
+
+def read_arff(fpath, converters=None, dropna=True, nworkers=1):
+    if isinstance(fpath, (str, bytes)) or hasattr(fpath, '__fspath__'):
+        return _read_arff(fpath, converters, dropna)
+    fpaths = list(fpath)
+    if nworkers == 1:
+        return [_read_arff(s, converters, dropna)  for s in fpaths]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=nworkers) as pool:
+        futures = [pool.submit(_read_arff, s, converters, dropna)  for s in fpaths]
+        return [f.result()  for f in futures]
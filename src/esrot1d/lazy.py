@@ -0,0 +1,37 @@
+
+'''
+Lazy loading of heavy dependencies (scipy, rft1d, h5py, matplotlib)
+
+Modules are imported on first use and cached, so that "import esrot1d"
+remains fast and so that frequently-called functions do not repeat
+import statements:
+
+    stats = scipy_stats()      # scipy.stats
+    rft1d = load('rft1d')      # any module
+    m     = optional('x')      # any module, or None if it is not installed
+'''
+
+
+import importlib
+_modules = dict()
+_missing = set()
+
+
+
+def load(name):
+    m = _modules.get(name)
+    if m is None:
+        m = _modules[name] = importlib.import_module(name)
+    return m
+
+def optional(name):
+    if name in _missing:
+        return None
+    try:
+        return load(name)
+    except ImportError:
+        _missing.add(name)
+        return None
+
+def scipy_stats():
+    return load('scipy.stats')
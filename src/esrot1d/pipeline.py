@@ -0,0 +1,231 @@
+
+'''
+End-to-end analysis of 0D or 1D data with cached intermediate results
+
+An Analysis object holds the data and design, and calculates the following
+quantities only when they are first requested, caching them for later use:
+
+* d, t, v      # d-value (0D) or d-field (1D), t-value(s), degrees of freedom
+* residuals    # normalized residuals (1D only;  see stats.moments_1sample)
+* lkc, fwhm    # smoothness estimates (1D only)
+* d_critical(...)   # critical d-values (CriticalValues) for any scenario and baseline
+* interpret(...)    # label (e.g. "Large") of the largest critical d-value exceeded
+
+Example:
+
+    import esrot1d as e1d
+    a   = e1d.analyze(y1 - y2)             # 1-sample design;  y has shape (n, Q)
+    a.fwhm                                 # estimated smoothness
+    cv  = a.d_critical()                   # critical values for the observed n, design, Q and fwhm
+    cv  = a.d_critical(n=20, design='2sample')   # other scenarios (smoothness: as observed)
+    a.save('analysis.h5')                  # data and all cached results
+    a   = e1d.pipeline.Analysis.load('analysis.h5')
+
+The d_critical scenario defaults (n, design, dim, Q, fwhm) are those of the data;
+for 2-sample data with unequal group sizes the default critical values use the
+actual group sizes (n0, n1), with v = n0 + n1 - 2.
+'''
+
+
+import numpy as np
+
+
+
+class Analysis(object):
+    def __init__(self, y0, y1=None, mu=0):
+        self.y0      = np.asarray(y0, dtype=float)
+        self.y1      = None if (y1 is None) else np.asarray(y1, dtype=float)
+        self.mu      = mu
+        self.design  = '1sample' if (y1 is None) else '2sample'
+        if (self.y1 is not None) and np.any( np.asarray(mu) != 0 ):
+            raise ValueError( '"mu" is only supported for 1-sample designs.' )
+        if (self.y1 is not None) and (self.y0.shape[1:] != self.y1.shape[1:]):
+            raise ValueError( f'y0 and y1 must have the same shape along all axes except axis 0. Shapes: {self.y0.shape}, {self.y1.shape}' )
+        if self.y0.ndim not in (1, 2):
+            raise ValueError( f'Data must have shape (n,) (0D) or (n, Q) (1D). Actual shape: {self.y0.shape}' )
+        self._cache    = dict()
+        self._critical = dict()
+
+    def __repr__(self):
+        s  = f'{self.__class__.__name__}\n'
+        s += f'    design   = {self.design}\n'
+        s += f'    n        = {self.n}\n'
+        s += f'    dim      = {self.dim}\n'
+        if self.dim == 1:
+            s += f'    Q        = {self.Q}\n'
+        s += f'    cached   = {sorted(self._cache)}\n'
+        s += f'    scenarios (critical values) = {len(self._critical)}\n'
+        return s
+
+    @property
+    def dim(self):
+        return self.y0.ndim - 1
+
+    @property
+    def n(self):
+        return self.y0.shape[0] + (0 if (self.y1 is None) else self.y1.shape[0])
+
+    @property
+    def Q(self):
+        return None if (self.dim == 0) else self.y0.shape[1]
+
+    # ---- cached intermediates ----------
+
+    def _moments(self):
+        if 'd' not in self._cache:
+            from . stats.d import moments_1sample, moments_2sample
+            if self.design == '1sample':
+                d,t,v,e = moments_1sample(self.y0, mu=self.mu, residuals=True)
+            else:
+                d,t,v,e = moments_2sample(self.y0, self.y1, residuals=True)
+            self._cache.update( d=d, t=t, v=v, residuals=e )
+        return self._cache
+
+    def _assert_1d(self, name):
+        if self.dim == 0:
+            raise ValueError( f'"{name}" is only defined for 1D data.' )
+
+    @property
+    def d(self):
+        return self._moments()['d']
+
+    @property
+    def t(self):
+        return self._moments()['t']
+
+    @property
+    def v(self):
+        return self._moments()['v']
+
+    @property
+    def residuals(self):
+        self._assert_1d('residuals')
+        return self._moments()['residuals']
+
+    @property
+    def lkc(self):
+        self._assert_1d('lkc')
+        if 'lkc' not in self._cache:
+            from . smoothness import estimate_lkc
+            self._cache['lkc'] = estimate_lkc( self.residuals )
+        return self._cache['lkc']
+
+    @property
+    def fwhm(self):
+        self._assert_1d('fwhm')
+        if 'fwhm' not in self._cache:
+            from . smoothness import lkc2fwhm
+            self._cache['fwhm'] = lkc2fwhm( self.lkc, self.Q )
+        return self._cache['fwhm']
+
+    @property
+    def dmax(self):
+        return float( np.max(self.d) )
+
+    # ---- critical values ----------
+
+    def _scenario(self, n, design, dim, Q, fwhm):
+        design = self.design if (design is None) else design
+        if n is None:
+            n  = self.n
+            if (design == '2sample') and (self.design == '2sample') and (self.y0.shape[0] != self.y1.shape[0]):
+                n  = (self.y0.shape[0], self.y1.shape[0])   # unequal group sizes
+        dim    = self.dim if (dim is None) else dim
+        if dim == 1:
+            Q      = self.Q if (Q is None) else Q
+            fwhm   = self.fwhm if (fwhm is None) else fwhm
+        return n, design, dim, Q, fwhm
+
+    def d_critical(self, n=None, design=None, dim=None, Q=None, fwhm=None, baseline=None, method='exact'):
+        from . baseline import BaselineScenario
+        from . stats.memo import CriticalValuesCache
+        from . stats.p import d_critical
+        baseline = BaselineScenario() if (baseline is None) else baseline
+        n,design,dim,Q,fwhm = self._scenario(n, design, dim, Q, fwhm)
+        key    = CriticalValuesCache.key(n, dim, design, Q, fwhm, baseline, method=method)
+        if key not in self._critical:
+            if isinstance(n, tuple):
+                self._critical[key] = self._d_critical_groups(n, dim, Q, fwhm, baseline, method)
+            else:
+                self._critical[key] = d_critical(n, dim=dim, design=design, Q=Q, fwhm=fwhm, baseline=baseline, method=method, cache=False)
+        return self._critical[key]
+
+    @staticmethod
+    def _d_critical_groups(n, dim, Q, fwhm, baseline, method):
+        # 2-sample design with unequal group sizes (n0, n1):  stats.d_critical assumes
+        # equal groups, so critical t-values (v = n0 + n1 - 2) are converted directly
+        from . baseline import CriticalValues
+        from . stats.p import p2t
+        n0,n1  = n
+        t      = p2t(baseline.p, n0 + n1 - 2, dim=dim, Q=Q, fwhm=fwhm, method=method)
+        return CriticalValues( t * (1/n0 + 1/n1)**0.5, baseline.p, labels=baseline.labels )
+
+    def interpret(self, n=None, design=None, dim=None, Q=None, fwhm=None, baseline=None, method='exact', dmax=False):
+        '''
+        Label of the largest critical d-value exceeded by d (empty string if none are exceeded),
+        for each node (or for the d-max value if dmax=True)
+
+        As elsewhere, a critical value is exceeded if d > d_critical;  d-values equal
+        to a critical value belong to the lower band.
+        '''
+        cv     = self.d_critical(n, design, dim, Q, fwhm, baseline, method)
+        d      = self.dmax if dmax else self.d
+        i      = np.searchsorted(cv.d, d, side='left')
+        labels = np.array( ('',) + tuple(cv.labels) )
+        x      = labels[i]
+        return str(x) if (np.ndim(x) == 0) else x
+
+    # ---- HDF5 serialization ----------
+    # Data and all cached results are stored as flat datasets;  critical values
+    # are stored as "critical%04d" (d-values), and their scenarios and baselines
+    # as typed datasets:  "critical%04d_n" (total sample size, or the two group sizes), "_dim", "_design", "_Q", "_fwhm" (NaN
+    # for None), "_method", "_baseline_d", "_baseline_p" and "_labels"
+
+    _critical_fields = ('n', 'dim', 'design', 'Q', 'fwhm', 'method', 'baseline_d', 'baseline_p', 'labels')
+
+    def save(self, fpath, residuals=True, **kwargs):
+        from . io import save_h5
+        d      = dict(y0=self.y0, mu=self.mu, design=self.design)
+        if self.y1 is not None:
+            d['y1'] = self.y1
+        for k,x in self._cache.items():
+            if residuals or (k != 'residuals'):
+                d[k] = x
+        for i,(key,cv) in enumerate( self._critical.items() ):
+            n,dim,design,Q,fwhm,method,bd,bp,labels = key
+            s      = f'critical{i:04d}'
+            d[s]   = cv.d
+            x      = dict(n=np.array(n, dtype=float), dim=dim, design=design, Q=np.nan if (Q is None) else float(Q), fwhm=np.nan if (fwhm is None) else float(fwhm), method=method, baseline_d=np.array(bd), baseline_p=np.array(bp), labels=np.array(labels, dtype=bytes))
+            d.update( {f'{s}_{k}':x[k]  for k in self._critical_fields} )
+        save_h5(fpath, d, **kwargs)
+
+    @classmethod
+    def load(cls, fpath):
+        from . baseline import BaselineScenario, CriticalValues
+        from . stats.memo import CriticalValuesCache
+        from . io import load_h5
+        d      = load_h5(fpath)
+        d      = {k:(x.item() if (x.ndim == 0) else x)  for k,x in d.items()}
+        dec    = lambda x: x.decode() if isinstance(x, bytes) else x
+        self   = cls( d.pop('y0'), d.pop('y1', None), mu=d.pop('mu') )
+        d.pop('design')
+        for s in [k  for k in d  if k.startswith('critical') and ('_' not in k)]:
+            x      = {k:d.pop(f'{s}_{k}')  for k in self._critical_fields}
+            labels = [dec(lb)  for lb in x['labels']]
+            bl     = BaselineScenario.custom(x['baseline_d'], x['baseline_p'], labels)
+            Q,fwhm = [None if np.isnan(x[k]) else x[k]  for k in ('Q', 'fwhm')]
+            n      = tuple(x['n']) if np.ndim(x['n']) else x['n']
+            key    = CriticalValuesCache.key(n, x['dim'], dec(x['design']), Q, fwhm, bl, method=dec(x['method']))
+            self._critical[key] = CriticalValues( d.pop(s), bl.p, labels=bl.labels )
+        if ('d' in d) and ('residuals' not in d) and (self.dim == 1):   # residuals not saved:  recalculate all moments when needed
+            d  = {k:x  for k,x in d.items()  if k not in ('d', 't', 'v')}
+        self._cache.update( d )
+        return self
+
+
+
+def analyze(y0, y1=None, mu=0):
+    '''
+    Create an Analysis object (1-sample design if y1 is None, otherwise 2-sample)
+    '''
+    return Analysis(y0, y1, mu=mu)
@@ -0,0 +1,272 @@
+
+'''
+Vectorized Monte Carlo simulation of d-values and functional d-maxima
+
+Random samples are generated in batches with shape (batch, n) (0D)
+or (batch, n, Q) (1D), and d-values and their maxima are calculated
+along the batch axis in a single vectorized pass. The batch size is
+chosen so that the memory required for a batch (random data and the
+temporaries of the FFT smoothing and d-value calculations) does not
+exceed "max_bytes".
+
+* dmax_1sample(niter, n, ...)   # simulated d (0D) or d-max (1D) values, 1-sample design
+* dmax_2sample(niter, n, ...)   # simulated d (0D) or d-max (1D) values, 2-sample design
+* dmax(niter, n, design, ...)   # either of the above
+* run_scenarios(scenarios, ...) # multiple scenarios, optionally in parallel and with checkpoints
+* empirical_sf(x, u, ...)       # empirical survival function of simulated values (with confidence bands)
+* randn1d(size, Q, fwhm, ...)   # smooth (unit-variance) Gaussian 1D random fields, shape:  size + (Q,)
+
+As elsewhere in esrot1d, n is the total sample size for the 2-sample design.
+'''
+
+
+import numpy as np
+from functools import lru_cache
+from . dec import _assert_design
+from . stats.d import d_1sample, d_2sample
+from . lazy import scipy_stats
+
+
+
+# ---- smooth Gaussian random fields ----------
+# Fields are generated by FFT convolution of Gaussian noise with a sampled
+# Gaussian kernel (truncated at 4 SD), as for rft1d.random.Generator1D, which
+# smooths using scipy.ndimage.gaussian_filter1d (mode="wrap"). The kernel spectrum,
+# scaled so that the smoothed fields have exactly unit variance, is cached for
+# each (Q, fwhm, pad) combination.
+#
+# * pad=False:  periodic fields (circular convolution of Q noise nodes)
+# * pad=True:   non-periodic fields;  rft1d smooths a longer (q-node) periodic
+#               field and returns its central Q nodes, which depend only on the
+#               central Q + 2r noise nodes (r: kernel radius), so only these are
+#               generated and linearly convolved
+#
+# FFTs of lengths with large prime factors (e.g. Q=101) are slow, so circular
+# convolutions of such lengths are calculated as linear convolutions of a fast
+# length (>= 2q) and then folded.
+
+def _fast_len(n):
+    # smallest 5-smooth integer (2^a 3^b 5^c) >= n
+    best   = 2 ** int(np.ceil(np.log2(n)))
+    p5     = 1
+    while p5 < best:
+        p35    = p5
+        while p35 < best:
+            m  = p35
+            while m < n:
+                m *= 2
+            best   = min(best, m)
+            p35   *= 3
+        p5    *= 5
+    return best
+
+def _padded_size(Q, fwhm):
+    # rft1d's padding rule (number of pre-smoothing nodes)
+    q      = 2*Q if (fwhm < 3) else 10*Q
+    if fwhm > 50:
+        q += Q * (fwhm - 50)
+    return int(q)
+
+@lru_cache(maxsize=64)
+def _kernel_spectrum(Q, fwhm, pad):
+    # returns:  number of noise nodes (m), FFT length (L), first output node (i0), fold (bool), kernel spectrum (h)
+    sd     = fwhm / (8 * np.log(2))**0.5
+    r      = int(4 * sd + 0.5)
+    x      = np.arange(-r, r+1)
+    w      = np.exp( -0.5 * (x / sd)**2 )
+    w     /= w.sum()
+    m,i0   = Q, 0
+    if pad:
+        q  = _padded_size(Q, fwhm)
+        m,i0 = (Q + 2*r, r) if (Q + 2*r < q) else (q, int(q/2 - Q/2))
+    circular = m != Q + 2*r
+    L      = _fast_len(m)
+    if circular and (L != m):
+        L  = _fast_len(2*m)
+    k      = np.zeros(m if circular else L)
+    np.add.at(k, x % k.size, w)          # (for circular convolution, kernels wider than m wrap around)
+    k     /= np.sqrt( (k**2).sum() )     # unit variance
+    h      = np.fft.rfft(k, n=L)
+    h      = h.real if (L == k.size) else h   # (symmetric kernel:  real spectrum)
+    h.flags.writeable = False
+    return m, L, i0, (circular and (L != m)), h
+
+def randn1d(size, Q, fwhm, pad=False, rng=None, out=None):
+    '''
+    Smooth Gaussian 1D random fields with unit variance
+
+    size :  number of fields (int) or shape (e.g. (batch, n));  returned fields have shape size + (Q,)
+    pad  :  False (periodic fields) or True (non-periodic fields)
+    rng  :  numpy.random.Generator, seed or None
+    out  :  optional preallocated output array (float, C-contiguous)
+    '''
+    rng    = np.random.default_rng(rng)
+    size   = (size,) if np.isscalar(size) else tuple(size)
+    Q      = int(Q)
+    shape  = size + (Q,)
+    if out is None:
+        out = np.empty(shape)
+    elif (out.shape != shape) or (out.dtype != float) or not out.flags.c_contiguous:
+        raise ValueError( f'"out" must be a C-contiguous float array with shape {shape}.' )
+    fwhm   = float(fwhm)
+    if fwhm == 0:
+        rng.standard_normal(out=out)
+    elif np.isinf(fwhm):
+        out[...] = rng.standard_normal(size + (1,))
+    else:
+        m,L,i0,fold,h = _kernel_spectrum(Q, fwhm, bool(pad))
+        if m == Q:
+            y  = rng.standard_normal(out=out)
+        else:
+            y  = rng.standard_normal(size + (m,))
+        Y      = np.fft.rfft(y, n=L, axis=-1)
+        Y     *= h
+        z      = np.fft.irfft(Y, n=L, axis=-1)
+        out[...] = z[..., i0:i0+Q]
+        if fold:   # circular convolution of length m
+            out += z[..., m+i0:m+i0+Q]
+    return out
+
+
+
+def _iter_bytes(n, dim, Q, fwhm, pad):
+    # peak bytes per iteration:  the (n, Q) output buffer, temporaries of the same size
+    # for the d-value calculation (deviations and their squares) and, for smooth fields,
+    # the FFT temporaries of each field (noise, spectrum and inverse FFT)
+    if dim==0:
+        return 8 * n * 3
+    nodes  = 3 * Q
+    fwhm   = float(fwhm)
+    if (fwhm > 0) and np.isfinite(fwhm):
+        m,L,i0,fold,h = _kernel_spectrum(int(Q), fwhm, bool(pad))
+        nodes += (0 if (m == Q) else m) + L + 2 * (L//2 + 1)
+    return 8 * n * nodes
+
+def _batch_size(niter, nbytes, max_bytes):
+    return int( min(niter, max(1, max_bytes // nbytes)) )
+
+def _dmax(niter, n, design, dim, Q, fwhm, pad, rng, max_bytes):
+    rng    = np.random.default_rng(rng)
+    Q      = 1 if (dim==0) else int(Q)
+    batch  = _batch_size(niter, _iter_bytes(n, dim, Q, fwhm, pad), max_bytes)
+    buf    = np.empty( (batch, n, Q) ) if (dim==1) else None
+    x      = np.empty(niter)
+    for i0 in range(0, niter, batch):
+        b  = min(batch, niter - i0)
+        if dim==0:
+            y  = rng.standard_normal( (b, n) )
+        else:
+            y  = randn1d( (b, n), Q, fwhm, pad=pad, rng=rng, out=buf[:b] )
+        if design=='1sample':
+            d  = d_1sample(y, axis=1)
+        else:
+            n0 = n // 2
+            d  = d_2sample(y[:,:n0], y[:,n0:], axis=1)
+        x[i0:i0+b] = d if (dim==0) else d.max(axis=1)
+    return x
+
+
+
+@_assert_design
+def dmax(niter, n, design='1sample', dim=1, Q=101, fwhm=20, pad=False, rng=None, max_bytes=2**27):
+    if (design=='2sample') and (n%2 != 0):
+        raise ValueError( f'Unsupported sample size: n = {n}. For a 2-sample design n represents the total sample size and must be divisible by 2.')
+    return _dmax(int(niter), int(n), design, dim, Q, fwhm, pad, rng, max_bytes)
+
+def dmax_1sample(niter, n, dim=1, Q=101, fwhm=20, pad=False, rng=None, max_bytes=2**27):
+    return dmax(niter, n, design='1sample', dim=dim, Q=Q, fwhm=fwhm, pad=pad, rng=rng, max_bytes=max_bytes)
+
+def dmax_2sample(niter, n, dim=1, Q=101, fwhm=20, pad=False, rng=None, max_bytes=2**27):
+    return dmax(niter, n, design='2sample', dim=dim, Q=Q, fwhm=fwhm, pad=pad, rng=rng, max_bytes=max_bytes)
+
+
+
+def empirical_sf(x, u, ci=False, alpha=0.05):
+    '''
+    Empirical survival function:  the proportion of values in x which exceed each threshold in u
+
+    x is sorted once and all thresholds are evaluated using searchsorted.
+    If ci=True, exact (Clopper-Pearson) binomial confidence bands are also returned:
+
+        sf, lower, upper = empirical_sf(x, u, ci=True, alpha=0.05)
+    '''
+    x      = np.sort( np.ravel(x) )
+    u      = np.asarray(u, dtype=float)
+    n      = x.size
+    k      = n - np.searchsorted(x, u, side='right')    # number of values greater than u
+    sf     = k / n
+    if not ci:
+        return sf
+    stats = scipy_stats()
+    with np.errstate(invalid='ignore'):
+        lower  = np.where(k==0, 0, stats.beta.ppf(alpha/2, k, n-k+1))
+        upper  = np.where(k==n, 1, stats.beta.isf(alpha/2, k+1, n-k))
+    return sf, lower, upper
+
+
+
+# ---- parallel scenario runner ----------
+# Each scenario (a dict with keys:  niter, n, design, dim, Q, fwhm) is split into
+# chunks of "chunksize" iterations, and each chunk receives an independent random
+# stream from numpy.random.SeedSequence(seed, spawn_key=(scenario, chunk)).
+# Results are therefore identical for any number of workers. If "fpath" is
+# specified, completed chunks are checkpointed to an HDF5 file, and a run which
+# is interrupted can be resumed by calling run_scenarios again with the same arguments.
+# (As for all process pools, scripts using nworkers > 1 on platforms which spawn
+# new processes must guard their entry point with:  if __name__ == '__main__')
+
+def _chunk_key(i, j):
+    return f'scenario{i:04d}_chunk{j:05d}'
+
+def _run_chunk(i, j, scenario, niter, seed, max_bytes):
+    ss  = np.random.SeedSequence(seed, spawn_key=(i, j))
+    kw  = {k:v  for k,v in scenario.items()  if k != 'niter'}
+    x   = dmax(niter, rng=np.random.default_rng(ss), max_bytes=max_bytes, **kw)
+    return i, j, x
+
+def _run_description(scenarios, seed, chunksize):
+    import json
+    return json.dumps( dict(scenarios=scenarios, seed=seed, chunksize=chunksize), sort_keys=True, default=lambda x: x.item() )
+
+def run_scenarios(scenarios, seed=0, nworkers=1, chunksize=10000, fpath=None, max_bytes=2**27):
+    import os
+    from . import io
+    scenarios = [dict(s)  for s in scenarios]
+    tasks     = []
+    for i,s in enumerate(scenarios):
+        niter = int( s['niter'] )
+        for j,i0 in enumerate( range(0, niter, chunksize) ):
+            tasks.append( (i, j, s, min(chunksize, niter-i0), seed, max_bytes) )
+    results   = dict()
+    if fpath is not None:
+        desc  = _run_description(scenarios, seed, chunksize)
+        if os.path.exists(fpath):
+            keys = io.load_h5_keys(fpath)
+            if ('run' not in keys) or (io.load_h5(fpath, keys=['run'])['run'].item().decode() != desc):
+                raise ValueError( f'Checkpoint file "{fpath}" was created for a different run.' )
+            ij   = {_chunk_key(i,j):(i,j)  for i,j,*_ in tasks}
+            d    = io.load_h5(fpath, keys=[k  for k in keys  if k in ij])
+            results = {ij[k]:x  for k,x in d.items()}
+        else:
+            io.save_h5_item(fpath, 'run', desc)
+    tasks     = [t  for t in tasks  if t[:2] not in results]
+
+    def _store(i, j, x):
+        results[(i,j)] = x
+        if fpath is not None:
+            io.save_h5_item(fpath, _chunk_key(i,j), x)
+
+    if nworkers == 1:
+        for t in tasks:
+            _store( *_run_chunk(*t) )
+    else:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        with ProcessPoolExecutor(max_workers=nworkers) as pool:
+            futures = [pool.submit(_run_chunk, *t)  for t in tasks]
+            for f in as_completed(futures):
+                _store( *f.result() )
+    x = []
+    for i,s in enumerate(scenarios):
+        nchunks = len( range(0, int(s['niter']), chunksize) )
+        x.append( np.hstack([results[(i,j)]  for j in range(nchunks)]) )
+    return x
@@ -7,6 +7,9 @@ Basic estimations of the following two metrics are supported:
 - Lipschitz-Killing curvature (LKC)
 - Full-width at half-maximum (FWHM)
 
+Estimates can be calculated for single (n, Q) residual arrays or for
+(..., n, Q) stacks of datasets (one estimate per dataset).
+
 References:
 
 Barnes GR, Ridgway GR, Flandin G, Woolrich M, Friston K (2013). Set-level threshold-free tests on the intrinsic volumes of SPMs. NeuroImage 68:133-40.
@@ -19,6 +22,7 @@ https://doi.org/10.1198/016214507000000815
 
 from math import log
 import numpy as np
+from . instrument import _instrumented
 eps    = np.finfo(float).eps
 _4log2 = 4 * log(2)
 
@@ -39,16 +43,57 @@ def resels2lkc(resels, d=1):
     x = np.inf if (x > 1e9) else float(x)
     return x
 
-def estimate_fwhm(e):
-    lkc  = estimate_lkc( e )
-    fwhm = lkc2fwhm(lkc, e.shape[1])
+@_instrumented('smoothness.estimate_fwhm', count='input')
+def estimate_fwhm(e, out=None, overwrite=False, chunksize=None):
+    '''
+    FWHM estimate for a single (n, Q) residual array, or for each dataset in a (..., n, Q) stack
+    '''
+    Q    = e.shape[-1] if hasattr(e, 'shape') else np.shape(e)[-1]
+    lkc  = estimate_lkc( e, out=out, overwrite=overwrite, chunksize=chunksize )
+    fwhm = lkc2fwhm(lkc, Q)
+    if out is not None:
+        out[...] = fwhm
+        return out
     return fwhm
-    
-def estimate_lkc(e):
+
+def _lkc(e, out=None, overwrite=False):
+    s    = np.einsum('...iq,...iq->...q', e, e)**0.5
+    u    = np.divide(e, s[...,None,:], out=e if overwrite else None)   # eqn.5
+    d    = u[...,:-1]
+    np.subtract(u[...,1:], u[...,:-1], out=d)
+    ss   = np.einsum('...iq,...iq->...q', d, d)
+    return np.sum( ss**0.5, axis=-1, out=out )                         # eqn.6
+
+def _lkc_chunked(e, chunksize, out=None):
+    # walk the Q axis in chunks which overlap by one sample (for the differences in eqn.6);
+    # each chunk is copied (from an array, memmap or HDF5 dataset) and normalized in place
+    Q    = e.shape[-1]
+    lkc  = np.zeros(e.shape[:-2]) if (out is None) else out
+    if out is not None:
+        lkc[...] = 0
+    for i0 in range(0, max(Q-1, 1), chunksize):
+        x    = np.array( e[..., i0:min(i0+chunksize+1, Q)], dtype=float )
+        lkc += _lkc(x, overwrite=True)
+    return lkc
+
+@_instrumented('smoothness.estimate_lkc', count='input')
+def estimate_lkc(e, out=None, overwrite=False, chunksize=None):
     '''
     Lipschitz–Killing curvature, Taylor & Worsley (2007) Eqns.4-6
+
+    The input can be a single (n, Q) residual array or a (..., n, Q) stack,
+    in which case one LKC value is returned per dataset (optionally into "out").
+
+    At most one full-size temporary is allocated (the normalized residuals);
+    if overwrite=True (and e is a floating-point array) e itself is used instead.
+
+    For very long fields, or for memory-mapped arrays and HDF5 datasets, specify
+    "chunksize" (number of nodes) to process the Q axis in chunks;  only one chunk
+    is then held in memory at a time.
     '''
-    u   = e / (e**2).sum(axis=0)**0.5            # eqn.5
-    d   = np.diff(u, axis=1)
-    lkc = (  (d**2).sum(axis=0)**0.5  ).sum()    # eqn.6
-    return lkc
\ No newline at end of file
+    if chunksize is None:
+        e    = np.asarray(e)
+        lkc  = _lkc(e, out=out, overwrite=overwrite)
+    else:
+        lkc  = _lkc_chunked(e, int(chunksize), out=out)
+    return float(lkc) if (len(e.shape) == 2) else lkc
@@ -1,3 +1,5 @@
 
-from . d import d_1sample, d_2sample, d2t, t2d
-from . p import d2p, t2p, p2d, p2t, d_critical
\ No newline at end of file
+from . d import d_1sample, d_2sample, d2t, t2d, moments_1sample, moments_2sample
+from . p import d2p, t2p, p2d, p2t, d_critical, d_critical_table, n_min
+from . memo import CriticalValuesCache, d_critical_cache
+from . online import D1SampleAccumulator, D2SampleAccumulator
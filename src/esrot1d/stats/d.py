@@ -6,72 +6,135 @@ Calculate d-values for 1- and 2-sample designs and convert between t- and d-valu
 * d_2sample(y0,y1)  # d-value for 2-sample case
 * d2t(d,n)          # convert d- to t-values
 * t2d(t,n)          # convert t- to d-values
+* moments_1sample(y)      # d, t, degrees of freedom and (optionally) normalized residuals, 1-sample case
+* moments_2sample(y0,y1)  # d, t, degrees of freedom and (optionally) normalized residuals, 2-sample case
 '''
 
 
 
 import numpy as np
 from .. dec import _assert_design, _check_n_2sample, _nd_vectorize
-
-
-def _isint(x): # check whether input argument is an integer
-    return isinstance(x, (int, np.integer))
-
+from .. instrument import _instrumented
 
 
 # ----- private functions ----------
+# array-native conversions;  broadcasting is handled by the public API
 
-@_nd_vectorize
 def _d2t_1sample(d, n):
     return d / (1/n)**0.5
 
-@_nd_vectorize
 @_check_n_2sample
 def _d2t_2sample(d, n):
-    n0,n1 = (n/2, n/2) if _isint(n) else n 
+    n0,n1 = n/2, n/2
     return d / (1/n0 + 1/n1)**0.5
 
-@_nd_vectorize
 def _t2d_1sample(t, n):
     return t * (1/n)**0.5
 
-@_nd_vectorize
 @_check_n_2sample
 def _t2d_2sample(t, n):
-    n0,n1 = (n/2, n/2) if _isint(n) else n 
+    n0,n1 = n/2, n/2
     return t * (1/n0 + 1/n1)**0.5
 
+def _d2t(d, n, design='1sample'):
+    if design == '1sample':
+        return _d2t_1sample(d, n)
+    elif design == '2sample':
+        return _d2t_2sample(d, n)
+
+def _t2d(t, n, design='1sample'):
+    if design == '1sample':
+        return _t2d_1sample(t, n)
+    elif design == '2sample':
+        return _t2d_2sample(t, n)
+
 
 
 # ----- public API ----------
 
 
-def d_1sample(y, mu=0):
+def d_1sample(y, mu=0, axis=0):
     y  = np.asarray(y, dtype=float)
-    d  = ( y.mean(axis=0) - mu ) / y.std(axis=0, ddof=1)
+    d  = ( y.mean(axis=axis) - mu ) / y.std(axis=axis, ddof=1)
     return d
 
-def d_2sample(y0, y1):
+def d_2sample(y0, y1, axis=0):
     y0,y1 = [np.asarray(yy, dtype=float)  for yy in (y0,y1)]
-    n0,n1 = y0.shape[0], y1.shape[0]
-    m0,m1 = y0.mean(axis=0), y1.mean(axis=0)
-    v0,v1 = y0.var(axis=0, ddof=1), y1.var(axis=0, ddof=1)
+    n0,n1 = y0.shape[axis], y1.shape[axis]
+    m0,m1 = y0.mean(axis=axis), y1.mean(axis=axis)
+    v0,v1 = y0.var(axis=axis, ddof=1), y1.var(axis=axis, ddof=1)
     sp    = (  (  (n0-1)*v0 + (n1-1)*v1  )  /  (n0+n1-2)  )**0.5
     return (m0 - m1) / sp
-    
+
+
+
+# ----- fused moments ----------
+# d, t and degrees of freedom (v) are calculated from a single set of residuals:
+# the mean is calculated (first read of y), the residuals are written once
+# (second read of y;  optionally into a caller-supplied buffer "out") and all
+# other quantities are calculated from the residuals. If residuals=True (or if
+# "out" is specified) the residuals are also returned, normalized by their
+# root sum of squares (at each node), as required by smoothness.estimate_lkc.
+
+def _sumsq(e, axis):
+    e  = np.moveaxis(e, axis, 0)
+    return np.einsum('i...,i...->...', e, e)
+
+def moments_1sample(y, mu=0, axis=0, residuals=False, out=None):
+    '''
+    Returns (d, t, v) or (d, t, v, e) for residuals=True (or if "out" is specified)
+    '''
+    y     = np.asarray(y, dtype=float)
+    n     = y.shape[axis]
+    m     = y.mean(axis=axis, keepdims=True)
+    e     = np.subtract(y, m, out=out)
+    s     = _sumsq(e, axis)**0.5
+    d     = ( np.squeeze(m, axis=axis) - mu ) / ( s / (n - 1)**0.5 )
+    t     = d * n**0.5
+    if not (residuals or (out is not None)):
+        return d, t, n - 1
+    e    /= np.expand_dims(s, axis)
+    return d, t, n - 1, e
+
+def moments_2sample(y0, y1, axis=0, residuals=False, out=None):
+    '''
+    Returns (d, t, v) or (d, t, v, e) for residuals=True (or if "out" is specified);
+    residuals e have shape (n0+n1, ...) along "axis" (group 0 first)
+
+    Unlike d2t, unequal group sizes are supported.
+    '''
+    y0,y1 = [np.asarray(yy, dtype=float)  for yy in (y0,y1)]
+    n0,n1 = y0.shape[axis], y1.shape[axis]
+    m0,m1 = y0.mean(axis=axis, keepdims=True), y1.mean(axis=axis, keepdims=True)
+    if out is not None:
+        residuals   = True
+    else:
+        shape       = list(y0.shape)
+        shape[axis] = n0 + n1
+        out         = np.empty(shape)
+    e     = np.moveaxis(out, axis, 0)
+    np.subtract( np.moveaxis(y0, axis, 0), np.moveaxis(m0, axis, 0), out=e[:n0] )
+    np.subtract( np.moveaxis(y1, axis, 0), np.moveaxis(m1, axis, 0), out=e[n0:] )
+    s     = _sumsq(e, 0)**0.5
+    v     = n0 + n1 - 2
+    d     = np.squeeze(m0 - m1, axis=axis) / ( s / v**0.5 )
+    t     = d / (1/n0 + 1/n1)**0.5
+    if not residuals:
+        return d, t, v
+    e    /= s
+    return d, t, v, out
+
+@_instrumented('stats.d2t')
+@_nd_vectorize
 @_assert_design
 def d2t(d, n, design='1sample'):
-    if design == '1sample':
-        return _d2t_1sample(d, n)
-    elif design == '2sample':
-        return _d2t_2sample(d, n)
+    return _d2t(d, n, design=design)
 
+@_instrumented('stats.t2d')
+@_nd_vectorize
 @_assert_design
 def t2d(t, n, design='1sample'):
-    if design == '1sample':
-        return _t2d_1sample(t, n)
-    elif design == '2sample':
-        return _t2d_2sample(t, n)
+    return _t2d(t, n, design=design)
 
 
 
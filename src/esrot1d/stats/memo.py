@@ -0,0 +1,168 @@
+
+'''
+Memoization of critical d-values for repeated d_critical calls
+
+Critical d-values are cached in a bounded, in-process LRU cache which is
+keyed on the normalized scenario (n, dim, design, Q, fwhm, method) and the baseline's
+d-values, p-values and labels. An optional on-disk HDF5 store can be attached
+so that cached values survive restarts:
+
+    import esrot1d as e1d
+    cache = e1d.stats.d_critical_cache
+    cache.set_store()         # default: ~/.cache/esrot1d/critical_values.h5
+    cache.info()              # hit / miss statistics
+    cache.clear(store=True)   # explicit invalidation (memory and disk)
+'''
+
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+
+def default_store_path():
+    dir0 = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(dir0, 'esrot1d', 'critical_values.h5')
+
+
+
+def _num(x):
+    # integral values as int (so that e.g. Q=101 and Q=101.0 share a key), others as float
+    return int(x) if float(x).is_integer() else float(x)
+
+
+
+class CriticalValuesCache(object):
+    def __init__(self, maxsize=1024, fpath=None):
+        self.maxsize  = int(maxsize)
+        self.fpath    = fpath
+        self._d       = OrderedDict()
+        self._lock    = threading.Lock()
+        self._reset_stats()
+
+    def __contains__(self, key):
+        return key in self._d
+
+    def __len__(self):
+        return len(self._d)
+
+    def __repr__(self):
+        s  = f'{self.__class__.__name__}\n'
+        for k,v in self.info().items():
+            s += f'{k:>12} = {v}\n'
+        return s
+
+    def _reset_stats(self):
+        self.hits         = 0
+        self.misses       = 0
+        self.store_hits   = 0
+        self.store_writes = 0
+
+    @staticmethod
+    def _key2name(key):
+        return hashlib.sha1( repr(key).encode() ).hexdigest()
+
+    @staticmethod
+    def key(n, dim, design, Q, fwhm, baseline, method='exact'):
+        if dim == 0:
+            Q,fwhm,method = None, None, 'exact'   # irrelevant for 0D scenarios
+        else:
+            Q,fwhm = _num(Q), float(fwhm)
+        n     = tuple(_num(x)  for x in n) if isinstance(n, tuple) else _num(n)   # (group sizes:  see pipeline.Analysis)
+        bkey  = tuple(float(x) for x in baseline.d), tuple(float(x) for x in baseline.p), tuple(baseline.labels)
+        return (n, int(dim), str(design), Q, fwhm, str(method)) + bkey
+
+    def _store_get(self, key):
+        if (self.fpath is None) or not os.path.exists(self.fpath):
+            return None
+        import h5py
+        name = self._key2name(key)
+        with h5py.File(self.fpath, 'r') as f:
+            if (name in f) and (f[name].attrs['key'] == repr(key)):
+                return np.array( f[name] )
+        return None
+
+    def _store_put(self, key, d):
+        import h5py
+        os.makedirs(os.path.dirname( os.path.abspath(self.fpath) ), exist_ok=True)
+        name = self._key2name(key)
+        with h5py.File(self.fpath, 'a') as f:
+            if name in f:
+                del f[name]
+            f.create_dataset(name, data=d)
+            f[name].attrs['key'] = repr(key)
+        self.store_writes += 1
+
+    def _store_delete(self, key):
+        if (self.fpath is None) or not os.path.exists(self.fpath):
+            return
+        import h5py
+        name = self._key2name(key)
+        with h5py.File(self.fpath, 'a') as f:
+            if name in f:
+                del f[name]
+
+    def get(self, key):
+        with self._lock:
+            if key in self._d:
+                self._d.move_to_end(key)
+                self.hits += 1
+                return self._d[key]
+            d = self._store_get(key)
+            if d is None:
+                self.misses += 1
+                return None
+            self.store_hits += 1
+            self._put(key, d)
+            return self._d[key]
+
+    def _put(self, key, d):
+        d = np.array(d, dtype=float)
+        d.flags.writeable = False
+        self._d[key] = d
+        self._d.move_to_end(key)
+        while len(self._d) > self.maxsize:
+            self._d.popitem(last=False)
+
+    def put(self, key, d):
+        with self._lock:
+            self._put(key, d)
+            if self.fpath is not None:
+                self._store_put(key, self._d[key])
+
+    def clear(self, store=False):
+        with self._lock:
+            self._d.clear()
+            self._reset_stats()
+            if store and (self.fpath is not None) and os.path.exists(self.fpath):
+                os.remove(self.fpath)
+
+    def info(self):
+        return dict(hits=self.hits, misses=self.misses, store_hits=self.store_hits, store_writes=self.store_writes, size=len(self), maxsize=self.maxsize, store=self.fpath)
+
+    def invalidate(self, n, dim=0, design='1sample', Q=None, fwhm=None, baseline=None, method='exact'):
+        from .. baseline import BaselineScenario
+        baseline = BaselineScenario() if (baseline is None) else baseline
+        key      = self.key(n, dim, design, Q, fwhm, baseline, method=method)
+        with self._lock:
+            self._d.pop(key, None)
+            self._store_delete(key)
+
+    def set_maxsize(self, maxsize):
+        with self._lock:
+            self.maxsize = int(maxsize)
+            while len(self._d) > self.maxsize:
+                self._d.popitem(last=False)
+
+    def set_store(self, fpath=None):
+        self.fpath = default_store_path() if (fpath is None) else fpath
+
+    def unset_store(self):
+        self.fpath = None
+
+
+
+d_critical_cache = CriticalValuesCache()
@@ -0,0 +1,150 @@
+
+'''
+Streaming (online) calculation of d-values for 1- and 2-sample designs
+
+Observations are added in chunks of rows (axis 0), and numerically stable
+running moments are maintained using Welford / Chan et al. updates, so the
+full (n, Q) data array never needs to be held in memory. Accumulators can be
+merged (e.g. after processing different files in parallel), and the current
+d-value (0D) or d-field (1D) is available at any time.
+
+* D1SampleAccumulator(mu=0)   # streaming equivalent of d_1sample(y, mu)
+* D2SampleAccumulator()       # streaming equivalent of d_2sample(y0, y1)
+
+Example:
+
+    acc = D1SampleAccumulator()
+    for y in chunks:          # each y has shape (k, Q)
+        acc.update( y )
+    d   = acc.d
+
+References:
+
+Welford BP (1962). Note on a method for calculating corrected sums of squares and products. Technometrics 4(3):419-20.
+
+Chan TF, Golub GH, LeVeque RJ (1983). Algorithms for computing the sample variance: analysis and recommendations. The American Statistician 37(3):242-7.
+'''
+
+
+import numpy as np
+
+
+
+class _RunningMoments(object):
+    '''
+    Running count (n), mean and sum of squared deviations (m2) along axis 0
+    '''
+    def __init__(self):
+        self.n     = 0
+        self.mean  = None
+        self.m2    = None
+
+    def _combine(self, n, mean, m2):
+        if n == 0:
+            return
+        if self.n == 0:
+            self.n, self.mean, self.m2 = n, mean, m2
+            return
+        N          = self.n + n
+        delta      = mean - self.mean
+        self.mean  = self.mean + delta * (n / N)
+        self.m2    = self.m2 + m2 + delta**2 * (self.n * n / N)
+        self.n     = N
+
+    def copy(self):
+        m = _RunningMoments()
+        if self.n > 0:
+            m.n, m.mean, m.m2 = self.n, self.mean.copy(), self.m2.copy()
+        return m
+
+    def merge(self, other):
+        if other.n > 0:
+            self._combine(other.n, other.mean.copy(), other.m2.copy())
+
+    def update(self, y):
+        y          = np.asarray(y, dtype=float)
+        if y.shape[0] == 0:
+            return
+        mean       = y.mean(axis=0)
+        m2         = ((y - mean)**2).sum(axis=0)
+        self._combine(y.shape[0], mean, m2)
+
+    def var(self, ddof=1):
+        return self.m2 / (self.n - ddof)
+
+
+
+class D1SampleAccumulator(object):
+    def __init__(self, mu=0):
+        self.mu    = mu
+        self._m    = _RunningMoments()
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(n={self.n})'
+
+    @property
+    def d(self):
+        return (self._m.mean - self.mu) / self._m.var(ddof=1)**0.5
+
+    @property
+    def n(self):
+        return self._m.n
+
+    def copy(self):
+        acc    = D1SampleAccumulator(self.mu)
+        acc._m = self._m.copy()
+        return acc
+
+    def merge(self, other):
+        self._m.merge( other._m )
+        return self
+
+    def update(self, y):
+        self._m.update( y )
+        return self
+
+
+
+class D2SampleAccumulator(object):
+    def __init__(self):
+        self._m0   = _RunningMoments()
+        self._m1   = _RunningMoments()
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(n0={self.n0}, n1={self.n1})'
+
+    @property
+    def d(self):
+        n0,n1  = self.n0, self.n1
+        sp     = (  ( self._m0.m2 + self._m1.m2 )  /  (n0+n1-2)  )**0.5
+        return (self._m0.mean - self._m1.mean) / sp
+
+    @property
+    def n(self):
+        return self.n0 + self.n1
+
+    @property
+    def n0(self):
+        return self._m0.n
+
+    @property
+    def n1(self):
+        return self._m1.n
+
+    def copy(self):
+        acc     = D2SampleAccumulator()
+        acc._m0 = self._m0.copy()
+        acc._m1 = self._m1.copy()
+        return acc
+
+    def merge(self, other):
+        self._m0.merge( other._m0 )
+        self._m1.merge( other._m1 )
+        return self
+
+    def update(self, y0=None, y1=None):
+        if y0 is not None:
+            self._m0.update( y0 )
+        if y1 is not None:
+            self._m1.update( y1 )
+        return self
@@ -8,31 +8,126 @@ be n-2 for the two-sample case
 '''
 
 
+import numpy as np
 from .. dec import _assert_design, _check_n_2sample, _nd_vectorize
-
-
+from . d import _d2t, _t2d
+from . import tdist
+from .. instrument import _instrumented
+
+
+
+# ---- 1D random field theory ----------
+# survival function (and its inverse) for the maximum of a 1D t field;
+# this is the T-statistic, single-field (n=1), field-maximum (c=1, k=0) case
+# of rft1d.prob.rft, evaluated for arrays of (u, v, Q, fwhm) at once
+#
+# Reference:  Worsley KJ et al. (2004) [Eqn.2 and Table 2]
+
+_eps        = np.finfo(float).eps
+_sqrt_4log2 = (4 * np.log(2))**0.5
+
+
+@_instrumented('stats.rft.sf', count='input')
+def _t_sf_1d(u, v, Q, fwhm, deriv=False):
+    u,v,Q,fwhm = [np.asarray(x, dtype=float)  for x in (u,v,Q,fwhm)]
+    resels = (Q - 1) / fwhm
+    resels = np.where(resels==0, _eps, resels)    # infinitely smooth field
+    a      = 1 + u**2 / v
+    c      = _sqrt_4log2 / (2*np.pi)
+    ec0    = tdist.sf(u, v)                                               # EC density, dim: 0
+    ec1    = c * a**( (1-v) / 2 )                                         # EC density, dim: 1
+    ec     = np.maximum(ec0, _eps) + resels * np.maximum(ec1, _eps)       # expected upcrossings
+    p1     = -np.expm1( -(ec + _eps) )                                    # Poisson clumping heuristic
+    p      = np.maximum(p1, ec0)                                          # never below the 0D p-value
+    if not deriv:
+        return p
+    # analytical derivative with respect to u:
+    dec0   = -tdist.pdf(u, v)
+    dec1   = c * (1-v) * u / v * a**( -(1+v) / 2 )
+    dec    = np.where(ec0 > _eps, dec0, 0) + resels * np.where(ec1 > _eps, dec1, 0)
+    dp     = np.where(p1 >= ec0, np.exp( -(ec + _eps) ) * dec, dec0)
+    return p, dp
+
+@_instrumented('stats.rft.isf', count='input')
+def _t_isf_1d(p, v, Q, fwhm, tol=1e-12, maxiter=100):
+    '''
+    Safeguarded Newton iterations on log(sf(u)) = log(p), run simultaneously
+    for all elements; steps which leave the current bracket are replaced by
+    bisection steps.  Iteration stops when all steps are smaller than
+    tol * (1 + |u|), or after maxiter iterations.  The boundaries p=0 and p=1
+    are returned explicitly as inf and -inf, respectively (NaN outside [0, 1]).
+    '''
+    p,v,Q,fwhm = np.broadcast_arrays( *[np.asarray(x, dtype=float)  for x in (p,v,Q,fwhm)] )
+    # boundaries:  solve for interior p-values only
+    x          = np.where(p == 0, np.inf, np.where(p == 1, -np.inf, np.nan))
+    ok         = (p > 0) & (p < 1)
+    p,v,Q,fwhm = p[ok], v[ok], Q[ok], fwhm[ok]
+    # bracket the root:  the 1D p-value is never below the 0D p-value
+    lo     = tdist.isf(p, v)
+    w      = np.ones(lo.shape)
+    b      = _t_sf_1d(lo + w, v, Q, fwhm) > p
+    for i in range(64):
+        if not np.any(b):
+            break
+        w[b] *= 2
+        b    &= _t_sf_1d(lo + w, v, Q, fwhm) > p
+    hi     = lo + w
+    # initial guess:  Bonferroni-like threshold across the 0D and 1D resel counts
+    u      = np.clip( tdist.isf(p / (1 + (Q-1)/fwhm), v), lo, hi )
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        logp   = np.log(p)
+        for i in range(maxiter):
+            sf,dsf = _t_sf_1d(u, v, Q, fwhm, deriv=True)
+            g      = np.log(sf) - logp
+            b      = g > 0           # root is above u
+            lo     = np.where(b, u, lo)
+            hi     = np.where(b, hi, u)
+            u1     = u - g * sf / dsf
+            u1     = np.where( (u1 >= lo) & (u1 <= hi), u1, 0.5 * (lo + hi) )
+            done   = ~( np.abs(u1 - u) > tol * (1 + np.abs(u)) )
+            u      = u1
+            if np.all(done):
+                break
+    x[ok]  = u
+    return x if (x.ndim > 0) else x[()]
 
 
 
 # ---- p2t conversions ----------
 # convert p-values to t-values
 
-@_nd_vectorize
 def _p2t_0d(p, v):
-    from scipy import stats
-    return stats.t.isf(p, v)
+    return tdist.isf(p, v)
+
+def _p2t_1d(p, v, Q, fwhm, method='exact', **kwargs):
+    if method == 'exact':
+        return _t_isf_1d(p, v, Q, fwhm, **kwargs)
+    elif method == 'table':
+        from . import table
+        return table.isf(p, v, Q, fwhm)
+    else:
+        raise ValueError( f'Unknown method: "{method}". Only "exact" and "table" supported.' )
 
-@_nd_vectorize
-def _p2t_1d(p, v, Q, fwhm):
-    import rft1d
-    return rft1d.t.isf(p, v, Q, fwhm)
+def _assert_method(dim, method):
+    # the table (approximate) method is only available for 1D scenarios;  for 0D scenarios
+    # inverse probabilities are calculated directly, so method="table" would be silently ignored
+    if (dim==0) and (method=='table'):
+        raise ValueError( 'method="table" is only supported for dim=1;  0D conversions are always exact.' )
 
-@_nd_vectorize
-def p2t(p, v, dim=0, Q=None, fwhm=None):
+def _p2t(p, v, dim=0, Q=None, fwhm=None, **kwargs):
+    _assert_method(dim, kwargs.get('method', 'exact'))
     if dim==0:
         return _p2t_0d(p, v)
     else:
-        return _p2t_1d(p, v, Q, fwhm)
+        return _p2t_1d(p, v, Q, fwhm, **kwargs)
+
+@_instrumented('stats.p2t')
+@_nd_vectorize
+def p2t(p, v, dim=0, Q=None, fwhm=None, method='exact', tol=1e-12, maxiter=100):
+    # method:  "exact" (root finding) or "table" (approximate;  see table.py) for the dim=1 case
+    #          (method="table" raises a ValueError for dim=0)
+    # tol, maxiter:  root-finding options for the dim=1 case (see _t_isf_1d)
+    return _p2t(p, v, dim=dim, Q=Q, fwhm=fwhm, method=method, tol=tol, maxiter=maxiter)
 
 
 
@@ -40,49 +135,48 @@ def p2t(p, v, dim=0, Q=None, fwhm=None):
 # convert t-values to p-values
 
 def _t2p_0d(t, v):
-    from scipy import stats
-    return stats.t.sf(t, v)
+    return tdist.sf(t, v)
 
 def _t2p_1d(t, v, Q, fwhm):
-    import rft1d
-    return rft1d.t.sf(t, v, Q, fwhm)
+    return _t_sf_1d(t, v, Q, fwhm)
 
-@_nd_vectorize
-def t2p(t, v, dim=0, Q=None, fwhm=None):
+def _t2p(t, v, dim=0, Q=None, fwhm=None):
     if dim==0:
         return _t2p_0d(t, v)
     else:
         return _t2p_1d(t, v, Q, fwhm)
 
+@_instrumented('stats.t2p')
+@_nd_vectorize
+def t2p(t, v, dim=0, Q=None, fwhm=None):
+    return _t2p(t, v, dim=dim, Q=Q, fwhm=fwhm)
+
 
 
 # ---- d2p conversions ----------
 # convert d-values to p-values
 
 def _d2p_1sample_0d(d, n):
-    from . d import d2t
-    t = d2t(d, n, design='1sample')
-    p = t2p(t, n-1, dim=0)
+    t = _d2t(d, n, design='1sample')
+    p = _t2p_0d(t, n-1)
     return p
 
 def _d2p_1sample_1d(d, n, Q, fwhm):
-    from . d import d2t
-    t = d2t(d, n, design='1sample')
-    p = t2p(t, n-1, dim=1, Q=Q, fwhm=fwhm)
+    t = _d2t(d, n, design='1sample')
+    p = _t2p_1d(t, n-1, Q, fwhm)
     return p
 
 def _d2p_2sample_0d(d, n):
-    from . d import d2t
-    t = d2t(d, n, design='2sample')
-    p = t2p(t, n-2)
+    t = _d2t(d, n, design='2sample')
+    p = _t2p_0d(t, n-2)
     return p
 
 def _d2p_2sample_1d(d, n, Q, fwhm):
-    from . d import d2t
-    t  = d2t(d, n, design='2sample')
-    p = t2p(t, n-2, dim=1, Q=Q, fwhm=fwhm)
+    t = _d2t(d, n, design='2sample')
+    p = _t2p_1d(t, n-2, Q, fwhm)
     return p
 
+@_instrumented('stats.d2p')
 @_nd_vectorize
 @_assert_design
 def d2p(d, n, dim=0, Q=None, fwhm=None, design='1sample'):
@@ -101,40 +195,41 @@ def d2p(d, n, dim=0, Q=None, fwhm=None, design='1sample'):
 # convert p-values to d-values
 
 def _p2d_1sample_0d(p, n):
-    from . d import t2d
-    t  = p2t(p, n-1, dim=0)
-    d  = t2d(t, n, design='1sample')
+    t  = _p2t_0d(p, n-1)
+    d  = _t2d(t, n, design='1sample')
     return d
 
-def _p2d_1sample_1d(p, n, Q, fwhm):
-    from . d import t2d
-    t  = p2t(p, n-1, dim=1, Q=Q, fwhm=fwhm)
-    d  = t2d(t, n, design='1sample')
+def _p2d_1sample_1d(p, n, Q, fwhm, **kwargs):
+    t  = _p2t_1d(p, n-1, Q, fwhm, **kwargs)
+    d  = _t2d(t, n, design='1sample')
     return d
 
 def _p2d_2sample_0d(p, n):
-    from . d import t2d
-    t  = p2t(p, n-2, dim=0)
-    d  = t2d(t, n, design='2sample')
+    t  = _p2t_0d(p, n-2)
+    d  = _t2d(t, n, design='2sample')
     return d
 
-def _p2d_2sample_1d(p, n, Q, fwhm):
-    from . d import t2d
-    t  = p2t(p, n-2, dim=1, Q=Q, fwhm=fwhm)
-    d  = t2d(t, n, design='2sample')
+def _p2d_2sample_1d(p, n, Q, fwhm, **kwargs):
+    t  = _p2t_1d(p, n-2, Q, fwhm, **kwargs)
+    d  = _t2d(t, n, design='2sample')
     return d
 
+@_instrumented('stats.p2d')
 @_nd_vectorize
 @_assert_design
-def p2d(p, n, dim=0, Q=None, fwhm=None, design='1sample'):
+def p2d(p, n, dim=0, Q=None, fwhm=None, design='1sample', method='exact', tol=1e-12, maxiter=100):
+    # method:  "exact" (root finding) or "table" (approximate;  see table.py) for the dim=1 case
+    #          (method="table" raises a ValueError for dim=0)
+    # tol, maxiter:  root-finding options for the dim=1 case (see _t_isf_1d)
+    _assert_method(dim, method)
     if dim==0 and design=='1sample':
         return _p2d_1sample_0d(p, n)
     elif dim==0 and design=='2sample':
         return _p2d_2sample_0d(p, n)
     elif dim==1 and design=='1sample':
-        return _p2d_1sample_1d(p, n, Q, fwhm)
+        return _p2d_1sample_1d(p, n, Q, fwhm, method=method, tol=tol, maxiter=maxiter)
     elif dim==1 and design=='2sample':
-        return _p2d_2sample_1d(p, n, Q, fwhm)
+        return _p2d_2sample_1d(p, n, Q, fwhm, method=method, tol=tol, maxiter=maxiter)
     
 
 
@@ -143,21 +238,166 @@ def p2d(p, n, dim=0, Q=None, fwhm=None, design='1sample'):
 
 
 # @_assert_design
-def d_critical(n, dim=0, design='1sample', Q=None, fwhm=None, baseline=None):
+@_instrumented('stats.d_critical')
+def d_critical(n, dim=0, design='1sample', Q=None, fwhm=None, baseline=None, method='exact', cache=True):
+    # method:  "exact" (root finding) or "table" (approximate;  see table.py) for the dim=1 case
+    #          (method="table" raises a ValueError for dim=0)
+    # cache:   use (and update) the critical-value cache "d_critical_cache" (see memo.py)
     _assert_design(design)
     from .. baseline import BaselineScenario, CriticalValues
+    from . memo import d_critical_cache
     if baseline is None:
         baseline = BaselineScenario()
         p  = baseline.p  # critical p-values for the baseline scenario
     else:
         assert isinstance(baseline, BaselineScenario)
         p  = baseline.p
-    d  = p2d(p, n, dim=dim, design=design, Q=Q, fwhm=fwhm)
+    if not cache:
+        d  = p2d(p, n, dim=dim, design=design, Q=Q, fwhm=fwhm, method=method)
+        return CriticalValues( d, p, labels=baseline.labels )
+    key    = d_critical_cache.key(n, dim, design, Q, fwhm, baseline, method=method)
+    d      = d_critical_cache.get(key)
+    if d is None:
+        d  = p2d(p, n, dim=dim, design=design, Q=Q, fwhm=fwhm, method=method)
+        d_critical_cache.put(key, d)
     return CriticalValues( d, p, labels=baseline.labels )
 
 
 
+def d_critical_table(n, dim=0, design='1sample', Q=None, fwhm=None, baseline=None, method='exact'):
+    '''
+    Critical d-values for multiple scenarios, calculated in one vectorized solve
+
+    n, dim, design, Q and fwhm are broadcast against each other (scenarios);
+    a CriticalValuesTable (scenarios x baseline labels) is returned. The method
+    ("exact" or "table") applies to the dim=1 scenarios;  0D scenarios are always exact.
+    '''
+    from .. baseline import BaselineScenario, CriticalValuesTable
+    baseline = BaselineScenario() if (baseline is None) else baseline
+    assert isinstance(baseline, BaselineScenario)
+    nan      = np.nan
+    Q,fwhm   = [np.asarray(x, dtype=float)  for x in (Q, fwhm)]   # (None -> NaN)
+    n,dim,design,Q,fwhm = [np.ravel(x)  for x in np.broadcast_arrays(n, dim, np.asarray(design, dtype=str), Q, fwhm)]
+    for x in np.unique(design):
+        if x not in ['1sample', '2sample']:
+            raise ValueError( f'Unknown design: "{x}". Only "1sample" and "2sample" supported.' )
+    if not np.all( (dim==0) | (dim==1) ):
+        raise ValueError( 'dim must be 0 or 1.' )
+    if np.any( (dim==1) & (np.isnan(Q) | np.isnan(fwhm)) ):
+        raise ValueError( 'Q and fwhm must be specified for all dim=1 scenarios.' )
+    b2       = design == '2sample'
+    n        = n.astype(float)
+    v        = np.where(b2, n-2, n-1)
+    p        = baseline.p[None,:]
+    t        = np.empty( (n.size, p.size) )
+    b        = dim == 0
+    if np.any(b):
+        t[b]  = _p2t_0d(p, v[b,None])
+    if not np.all(b):
+        Q1,w1 = Q[~b].astype(float), fwhm[~b].astype(float)
+        t[~b] = _p2t_1d(p, v[~b,None], Q1[:,None], w1[:,None], method=method)
+    d        = np.empty(t.shape)
+    d[~b2]   = _t2d(t[~b2], n[~b2,None], design='1sample')
+    if np.any(b2):
+        d[b2] = _t2d(t[b2], n[b2,None], design='2sample')
+    dtype    = [('n', float), ('dim', int), ('design', 'U7'), ('Q', float), ('fwhm', float), ('d', float, (p.size,))]
+    data     = np.empty(n.size, dtype=dtype)
+    data['n'], data['dim'], data['design'] = n, dim, design
+    data['Q']    = np.where(b, nan, Q.astype(float))
+    data['fwhm'] = np.where(b, nan, fwhm.astype(float))
+    data['d']    = d
+    return CriticalValuesTable( data, baseline.p, baseline.labels )
+
     
+# ---- minimum sample size ----------
+# smallest sample size for which a given effect (d) reaches significance (p <= alpha);
+# for 2-sample designs the group sizes are (k, ceil(ratio*k)), so ratio=1 yields
+# the usual (even) total sample size n=2k.  The p-value decreases monotonically
+# with k, so the minimal k is found by bracketing (doubling) and integer bisection,
+# evaluated simultaneously for all (d, alpha, Q, fwhm, ratio) elements
+
+def _n_groups(k, design, ratio):
+    if design == '1sample':
+        return k, None
+    return k, np.ceil(ratio * k - 1e-9)   # (tolerance guards against round-off for integer-valued ratio*k)
+
+def _n2p(k, d, dim, Q, fwhm, design, ratio):
+    n0,n1  = _n_groups(k, design, ratio)
+    if design == '1sample':
+        t,v    = d * n0**0.5, n0 - 1
+    else:
+        t,v    = d / (1/n0 + 1/n1)**0.5, n0 + n1 - 2
+    return _t2p(t, v, dim=dim, Q=Q, fwhm=fwhm)
+
+def _n_min(d, alpha, dim, Q, fwhm, design, ratio, kmax):
+    # d, alpha, Q, fwhm, ratio, kmax:  flat arrays of equal size
+    def sig(i, k):   # significance test for elements i and smaller-group sizes k
+        return _n2p(k, d[i], dim, Q[i], fwhm[i], design, ratio[i]) <= alpha[i]
+    # smallest valid k (at least one degree of freedom):  k=1 is valid for 2-sample designs with n1 >= 2
+    n1     = np.zeros(d.size) if (design == '1sample') else _n_groups(1, design, ratio)[1]
+    kmin   = np.where(n1 >= 2, 1, 2)
+    lo     = kmin - 1                       # largest known non-significant k (kmin-1: lower bound)
+    hi     = kmin.copy()                    # candidate significant k
+    i      = np.arange(d.size)
+    # bracketing:
+    while i.size > 0:
+        b      = sig(i, hi[i])
+        i      = i[~b]
+        lo[i]  = hi[i]
+        if np.any( hi[i] >= kmax[i] ):
+            raise ValueError( f'Significance not reached for n <= nmax in {i.size} case(s);  increase nmax.' )
+        hi[i]  = np.minimum(2 * hi[i], kmax[i])
+    # bisection:
+    i      = np.flatnonzero( hi - lo > 1 )
+    while i.size > 0:
+        k      = (lo[i] + hi[i]) // 2
+        b      = sig(i, k)
+        hi[i[b]]  = k[b]
+        lo[i[~b]] = k[~b]
+        i      = i[ hi[i] - lo[i] > 1 ]
+    return hi
+
+def n_min(d, alpha=0.05, dim=0, Q=None, fwhm=None, design='1sample', ratio=1, nmax=10**7, return_groups=False):
+    '''
+    Minimum sample size for which effect size d is significant (p <= alpha)
+
+    d, alpha, Q, fwhm and ratio are broadcast against each other.
+
+    For 2-sample designs the group sizes are (n0, n1) = (k, ceil(ratio*k));
+    ratio=1 yields the usual (even) total sample size n = 2k.
+
+    Returns the total sample size n (int or int array), or (n, n0, n1) if
+    return_groups=True (n1 is None for 1-sample designs).
+    '''
+    if design not in ['1sample', '2sample']:
+        raise ValueError( f'Unknown design: "{design}". Only "1sample" and "2sample" supported.' )
+    Q,fwhm = [np.asarray(xx, dtype=float)  for xx in (Q, fwhm)]   # (None -> NaN)
+    x      = np.broadcast_arrays(d, alpha, Q, fwhm, ratio)
+    shape  = x[0].shape
+    d,alpha,Q,fwhm,ratio = [np.ravel(xx).astype(float)  for xx in x]
+    if np.any( d <= 0 ):
+        raise ValueError( 'd must be positive.' )
+    if np.any( (alpha <= 0) | (alpha >= 1) ):
+        raise ValueError( 'alpha must be between 0 and 1.' )
+    if np.any( ratio <= 0 ):
+        raise ValueError( 'ratio must be positive.' )
+    if (design == '1sample') and np.any( ratio != 1 ):
+        raise ValueError( 'ratio is only supported for 2-sample designs.' )
+    if dim not in (0, 1):
+        raise ValueError( 'dim must be 0 or 1.' )
+    if (dim == 1) and np.any( np.isnan(Q) | np.isnan(fwhm) ):
+        raise ValueError( 'Q and fwhm must be specified for dim=1.' )
+    kmax   = np.full(d.size, nmax) if (design == '1sample') else np.floor(nmax / (1 + ratio)).astype(int)
+    k      = _n_min(d, alpha, dim, Q, fwhm, design, ratio, kmax)
+    n0,n1  = _n_groups(k, design, ratio)
+    n      = n0 if (n1 is None) else n0 + n1
+    out    = [x if (x is None) else np.asarray(x, dtype=int).reshape(shape)  for x in (n, n0, n1)]
+    if shape == ():
+        out = [x if (x is None) else int(x)  for x in out]
+    return tuple(out) if return_groups else out[0]
+
+
+
 if __name__ == '__main__':
     # print( p2t(0.05, 8, dim=0) )
     # print( p2t(0.05, 8, dim=1, Q=101, fwhm=50) )
@@ -0,0 +1,100 @@
+
+'''
+Precomputed critical-threshold table for fast, approximate 1D inverse probabilities
+
+This table is used by p2t, p2d and d_critical when method='table' and dim=1.
+
+The 1D RFT critical t-value depends on Q and fwhm only through the resel count
+(Q-1)/fwhm, and critical d-values are exact conversions of critical t-values,
+so a single table of critical t-values over (v, resels, p) serves both 1- and
+2-sample designs and all Q values.
+
+Grid (50 x 50 x 50):
+
+* v      : 4 to 1000 (log-spaced)
+* resels : 0.1 to 1000 (log-spaced);  e.g. fwhm=0.1 to 1000 for Q=101
+* p      : 1e-6 to 0.5 (uniformly spaced in z = Phi^-1(1-p))
+
+Values are stored as asinh(t) - asinh(tb), where tb = stats.t.isf(p/(1+resels), v)
+is a Bonferroni-like threshold, and are interpolated piecewise-linearly in
+(log v, log resels, z) coordinates. Only the interpolated residual is piecewise-
+linear;  monotonicity of t_table (decreasing in p and v, increasing in resels)
+is not guaranteed by construction, but holds on a dense grid (tests/test_table.py).
+
+Error bound:  within the grid |t_table - t| < 0.03 (1 + |t|);  the largest errors
+(about 0.025 (1 + |t|)) occur for p close to 0.5 and fewer than about two resels.
+For p <= 0.1 errors are below 0.015 (1 + |t|), and 99% of all values are within
+0.005 (1 + |t|);  the same relative bounds apply to d.
+Points outside the grid are calculated using the exact (root-finding) method.
+
+The table is stored as package data ("data/t_critical_1d.npy") and is
+memory-mapped on first use;  it can be regenerated using "generate".
+'''
+
+
+import os
+import numpy as np
+from .. lazy import scipy_stats
+from . import tdist
+
+
+fpath_table = os.path.join( os.path.dirname( os.path.dirname(__file__) ), 'data', 't_critical_1d.npy' )
+V           = np.geomspace(4, 1000, 50)
+RESELS      = np.geomspace(0.1, 1000, 50)
+Z           = np.linspace(0, 4.753424308822899, 50)   # 4.7534... = stats.norm.isf(1e-6)
+_table      = None
+
+
+
+def _bonferroni(p, v, resels):
+    return tdist.isf(p / (1 + resels), v)
+
+def _interp(table, x):
+    # piecewise-linear interpolation on the uniform (log v, log resels, z) grid
+    i,w    = [], []
+    for xx,g in zip(x, (np.log(V), np.log(RESELS), Z)):
+        f  = (xx - g[0]) / (g[1] - g[0])
+        ii = np.clip( np.floor(f).astype(int), 0, g.size-2 )
+        i.append( ii )
+        w.append( f - ii )
+    y      = 0
+    for a in (0,1):
+        for b in (0,1):
+            for c in (0,1):
+                wabc = (w[0] if a else 1-w[0]) * (w[1] if b else 1-w[1]) * (w[2] if c else 1-w[2])
+                y    = y + wabc * table[i[0]+a, i[1]+b, i[2]+c]
+    return y
+
+def generate(fpath=None):
+    stats = scipy_stats()
+    from . p import _t_isf_1d
+    fpath    = fpath_table if (fpath is None) else fpath
+    v,r,p    = V[:,None,None], RESELS[None,:,None], stats.norm.sf(Z)[None,None,:]
+    t        = _t_isf_1d(p, v, r + 1, 1)
+    x        = np.arcsinh(t) - np.arcsinh( _bonferroni(p, v, r) )
+    np.save( fpath, x.astype(np.float32) )
+
+def load():
+    global _table
+    if _table is None:
+        _table = np.load(fpath_table, mmap_mode='r')
+    return _table
+
+def isf(p, v, Q, fwhm):
+    stats = scipy_stats()
+    from . p import _t_isf_1d
+    p,v,Q,fwhm = np.broadcast_arrays( *[np.asarray(x, dtype=float)  for x in (p,v,Q,fwhm)] )
+    resels     = (Q - 1) / fwhm
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x      = [np.log(v), np.log(resels), stats.norm.isf(p)]
+    b          = np.ones(p.shape, dtype=bool)
+    for xx,g in zip(x, (np.log(V), np.log(RESELS), Z)):
+        b     &= (xx >= g[0]) & (xx <= g[-1])
+    t          = np.empty(p.shape)
+    if np.any(b):
+        pp,vv,rr = p[b], v[b], resels[b]
+        y        = _interp( load(), [xx[b] for xx in x] )
+        t[b]     = np.maximum( np.sinh( y + np.arcsinh( _bonferroni(pp, vv, rr) ) ), tdist.isf(pp, vv) )
+    if not np.all(b):
+        t[~b]    = _t_isf_1d(p[~b], v[~b], Q[~b], fwhm[~b])
+    return t
@@ -1,6 +1,6 @@
 
 '''
-Utility functions for plotting, sorting and printing
+Utility functions for plotting, sorting, grouping and printing
 '''
 
 import numpy as np
@@ -32,6 +32,50 @@ def unique_sorted(x):
     return np.sort( np.unique(x) )
 
 
+def group_means(y, keys, min_count=1, carry=None):
+    '''
+    Means of the rows of y for each unique combination of key columns
+
+    All rows are sorted once (lexicographically by the key columns, in the
+    order given) and group sums are calculated using np.add.reduceat.
+
+    Arguments:
+
+    * y         : (n,) or (n, Q) array
+    * keys      : dict of (n,) key columns, e.g. dict(subj=subj, sess=sess)
+    * min_count : groups with fewer than this number of rows are discarded
+    * carry     : dict of (n,) columns for which the first value of each group is returned
+
+    Returns a dict containing the group means ("y"), the number of rows in
+    each group ("count") and one entry for each key and carry column, with
+    groups sorted by the key columns.
+    '''
+    y      = np.asarray(y)
+    keys   = {k:np.asarray(v)  for k,v in keys.items()}
+    carry  = dict() if (carry is None) else {k:np.asarray(v)  for k,v in carry.items()}
+    kk     = list( keys.values() )
+    i      = np.lexsort( kk[::-1] )    # np.lexsort sorts by the last key first
+    kk     = [x[i] for x in kk]
+    b      = np.zeros(y.shape[0], dtype=bool)
+    b[:1]  = True
+    for x in kk:
+        b[1:] |= x[1:] != x[:-1]
+    i0     = np.flatnonzero(b)
+    count  = np.diff( np.append(i0, y.shape[0]) )
+    if i0.size > 0:
+        s  = np.add.reduceat(y[i], i0, axis=0)
+    else:
+        s  = np.zeros((0,) + y.shape[1:])
+    k      = count >= min_count
+    m      = s[k] / count[k].reshape( (-1,) + (1,)*(y.ndim-1) )
+    d      = dict(y=m, count=count[k])
+    for name,x in zip(keys, kk):
+        d[name] = x[i0[k]]
+    for name,x in carry.items():
+        d[name] = x[i][i0[k]]
+    return d
+
+
 def plot_critical_values(ax, cv, ylim=(-1,1), colors=None):
     if colors is None:
         import matplotlib.pyplot as plt
@@ -16,3 +16,23 @@ def test_rot_p():
         assert pp1  == pytest.approx(pp0, rel=1e-4)
 
 
+
+
+def test_critical_values_mapping():
+    '''
+    Ensure that CriticalValues objects behave as immutable mappings
+    which share p-values and labels with their baseline
+    '''
+    bl    = e1d.BaselineScenario()
+    cv    = e1d.stats.d_critical(20, design='2sample', cache=False)
+    assert (cv.p is bl.p) and (cv.labels is bl.labels)
+    assert list(cv) == list(bl.labels)
+    assert cv['Large'] == pytest.approx(0.8, rel=1e-4)
+    assert dict(cv.tolist()) == dict(cv)
+    assert np.all( cv.toarray() == cv.d )
+    with pytest.raises(KeyError):
+        cv['Enormous']
+    with pytest.raises(AttributeError):
+        cv.d = np.zeros(6)
+    with pytest.raises(ValueError):
+        cv.d[0] = 0
@@ -0,0 +1,70 @@
+
+'''
+Ensure that cached critical d-values are identical to freshly
+calculated ones, and that the in-process and on-disk caches
+record hits and misses and can be invalidated.
+'''
+
+
+import pytest
+import numpy as np
+import esrot1d as e1d
+
+
+
+def test_cache_hits():
+    cache = e1d.stats.d_critical_cache
+    cache.clear()
+    cv0   = e1d.stats.d_critical(20, dim=1, design='2sample', Q=101, fwhm=21.9)
+    cv1   = e1d.stats.d_critical(20, dim=1, design='2sample', Q=101, fwhm=21.9)
+    cv2   = e1d.stats.d_critical(20, dim=1, design='2sample', Q=101, fwhm=21.9, cache=False)
+    assert cache.info()['misses'] == 1
+    assert cache.info()['hits'] == 1
+    assert np.all( cv0.toarray() == cv1.toarray() )
+    assert np.all( cv0.toarray() == cv2.toarray() )
+    cache.invalidate(20, dim=1, design='2sample', Q=101, fwhm=21.9)
+    assert len(cache) == 0
+
+
+def test_cache_baseline_key():
+    cache = e1d.stats.d_critical_cache
+    cache.clear()
+    bl    = e1d.BaselineScenario.custom([0.1, 0.5, 1], [0.4, 0.1, 0.001], ['A', 'BB', 'CCC'])
+    cv0   = e1d.stats.d_critical(10, design='1sample')
+    cv1   = e1d.stats.d_critical(10, design='1sample', baseline=bl)
+    assert cache.info()['misses'] == 2
+    assert cv1.labels == ('A', 'BB', 'CCC')
+
+
+def test_cache_noninteger_Q():
+    cache = e1d.stats.d_critical_cache
+    cache.clear()
+    cv0   = e1d.stats.d_critical(20, dim=1, Q=101, fwhm=20)
+    cv1   = e1d.stats.d_critical(20, dim=1, Q=101.5, fwhm=20)
+    cv2   = e1d.stats.d_critical(20, dim=1, Q=101.0, fwhm=20)
+    assert cache.info()['misses'] == 2
+    assert np.all( cv1.toarray() > cv0.toarray() )
+    assert np.all( cv2.toarray() == cv0.toarray() )
+    assert cv1.toarray() == pytest.approx( e1d.stats.d_critical(20, dim=1, Q=101.5, fwhm=20, cache=False).toarray(), rel=1e-12 )
+
+
+def test_cache_lru():
+    cache = e1d.stats.CriticalValuesCache(maxsize=2)
+    for i in range(3):
+        cache.put(i, [i])
+    assert len(cache) == 2
+    assert cache.get(0) is None
+    assert cache.get(2)[0] == 2
+
+
+def test_cache_store(tmp_path):
+    fpath  = tmp_path / 'cv.h5'
+    bl     = e1d.BaselineScenario()
+    cache0 = e1d.stats.CriticalValuesCache(fpath=fpath)
+    key    = cache0.key(20, 1, '2sample', 101, 21.9, bl)
+    cache0.put(key, np.arange(6.))
+    cache1 = e1d.stats.CriticalValuesCache(fpath=fpath)
+    assert np.all( cache1.get(key) == np.arange(6.) )
+    assert cache1.info()['store_hits'] == 1
+    cache1.clear(store=True)
+    assert not fpath.exists()
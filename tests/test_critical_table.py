@@ -0,0 +1,40 @@
+
+'''
+Ensure that batched critical d-values (d_critical_table) are identical
+to those calculated separately for each scenario using d_critical.
+'''
+
+
+import pytest
+import numpy as np
+import esrot1d as e1d
+
+
+
+def test_table():
+    ns      = [8, 20, 20, 52, 52, 9]
+    designs = ['2sample', '2sample', '1sample', '1sample', '2sample', '1sample']
+    dims    = [0, 1, 1, 0, 1, 1]
+    fwhms   = [np.nan, 21.9, 5, np.nan, 73.3, 10]
+    t       = e1d.stats.d_critical_table(ns, dim=dims, design=designs, Q=101, fwhm=fwhms)
+    assert len(t) == 6
+    assert t.d.shape == (6, 6)
+    for i,(n,design,dim,fwhm) in enumerate( zip(ns, designs, dims, fwhms) ):
+        cv  = e1d.stats.d_critical(n, dim=dim, design=design, Q=101, fwhm=fwhm, cache=False)
+        assert np.allclose(t[i].d, cv.d, rtol=1e-12)
+        assert t[i].labels == cv.labels
+        assert t.lookup(n, design=design, dim=dim, Q=101, fwhm=fwhm)['Large'] == t['Large'][i]
+    assert len(t[1:3]) == 2
+    assert len(t.tolist()) == 6
+
+
+def test_table_errors():
+    with pytest.raises(ValueError):
+        e1d.stats.d_critical_table(9, design='2sample')
+    with pytest.raises(ValueError):
+        e1d.stats.d_critical_table(10, design='3sample')
+    with pytest.raises(ValueError):
+        e1d.stats.d_critical_table(10, dim=1, fwhm=20)
+    with pytest.raises(ValueError):
+        e1d.stats.d_critical_table(10, dim=[0, 1], Q=101, fwhm=[20, None])
+    assert np.all( np.isfinite( e1d.stats.d_critical_table(10, dim=[0, 1], Q=[None, 101], fwhm=[None, np.inf])[1].d ) )
@@ -0,0 +1,37 @@
+
+'''
+Ensure that "import esrot1d" is fast and does not import heavy
+dependencies, and that lazily-loaded submodules resolve correctly.
+'''
+
+
+import os
+import subprocess
+import sys
+import pytest
+import esrot1d as e1d
+
+
+budget = 0.25    # maximum import time (s)
+
+
+
+def _run(code):
+    env  = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    return subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, env=env, check=True).stdout
+
+
+def test_import_time():
+    code = 'import time, sys; t0=time.perf_counter(); import esrot1d; t=time.perf_counter()-t0; print(t, *[m in sys.modules for m in ("numpy", "scipy", "h5py", "rft1d", "matplotlib")])'
+    t    = min( float(_run(code).split()[0])  for i in range(3) )
+    assert t < budget
+    assert _run(code).split()[1:] == ['False'] * 5
+
+
+def test_lazy_attributes():
+    for name in ('io', 'sim', 'smoothness', 'stats', 'util'):
+        assert getattr(e1d, name).__name__ == f'esrot1d.{name}'
+        assert name in dir(e1d)
+    assert e1d.BaselineScenario is e1d.baseline.BaselineScenario
+    with pytest.raises(AttributeError):
+        e1d.nonexistent_attribute
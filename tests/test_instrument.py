@@ -0,0 +1,45 @@
+
+'''
+Ensure that instrumentation records calls, elements and latencies
+when enabled, and that results are unchanged and nothing is recorded
+when disabled.
+'''
+
+
+import json
+import pytest
+import numpy as np
+import esrot1d as e1d
+
+
+
+def test_record():
+    rec0  = e1d.instrument.recorder
+    e     = np.random.default_rng(0).standard_normal((10, 101)).cumsum(axis=1)
+    with e1d.instrument.record(memory=True) as rec:
+        p = e1d.stats.d2p(np.linspace(0, 1, 5), 10, dim=1, Q=101, fwhm=20)
+        p = e1d.stats.d2p(0.5, 10)
+        e1d.stats.d_critical(20, dim=1, Q=101, fwhm=20, cache=False)
+        e1d.smoothness.estimate_fwhm(e)
+    s     = rec.summary()
+    assert rec is rec0
+    assert (s['stats.d2p']['calls'], s['stats.d2p']['elements']) == (2, 6)
+    assert s['stats.d_critical']['calls'] == 1
+    assert {'stats.d2p', 'stats.p2d', 'stats.d_critical', 'stats.rft.sf', 'stats.rft.isf', 'stats.tdist.sf', 'stats.tdist.isf', 'smoothness.estimate_lkc', 'smoothness.estimate_fwhm'} <= set(s)
+    assert s['stats.rft.isf']['calls'] == 1
+    assert s['stats.rft.isf']['total_time'] <= s['stats.d_critical']['total_time']
+    assert s['smoothness.estimate_lkc']['elements'] == e.size
+    assert s['smoothness.estimate_fwhm']['peak_memory'] > 0
+    assert s['smoothness.estimate_lkc']['peak_memory'] is None   # nested call
+    for v in s.values():
+        assert 0 < v['p50_time'] <= v['p99_time'] <= v['max_time'] <= v['total_time']
+    assert json.loads( rec.to_json() ) == json.loads( json.dumps(s) )
+    assert not rec.enabled
+
+
+def test_disabled():
+    e1d.instrument.reset()
+    p     = e1d.stats.p2d(0.05, 10, dim=1, Q=101, fwhm=20)
+    assert e1d.instrument.summary() == dict()
+    with e1d.instrument.record():
+        assert e1d.stats.p2d(0.05, 10, dim=1, Q=101, fwhm=20) == p
@@ -0,0 +1,103 @@
+
+'''
+Ensure that selective and lazy HDF5 loading returns the same data as
+full loading, that all supported compression options round-trip, and
+that ARFF files are parsed correctly.
+'''
+
+
+import pytest
+import numpy as np
+import esrot1d as e1d
+
+
+
+@pytest.fixture
+def fpath(tmp_path):
+    rng   = np.random.default_rng(0)
+    d     = dict(y=rng.standard_normal((20, 11)), x=np.arange(20), s=np.float64(3.5))
+    fpath = str(tmp_path / 'data.h5')
+    e1d.io.save_h5(fpath, d)
+    return fpath
+
+
+def test_selective(fpath):
+    d     = e1d.io.load_h5(fpath)
+    d1    = e1d.io.load_h5(fpath, keys=['y', 's'], rows=slice(2, 8))
+    assert set(d1.keys()) == {'y', 's'}
+    assert np.array_equal(d1['y'], d['y'][2:8])
+    assert d1['s'] == d['s']
+    rows  = [5, 1, 5, 19]   # unsorted and repeated
+    d2    = e1d.io.load_h5(fpath, keys=['x'], rows=rows)
+    assert np.array_equal(d2['x'], d['x'][rows])
+    d3    = e1d.io.load_h5(fpath, keys=['x'], rows=d['x'] % 3 == 0)
+    assert np.array_equal(d3['x'], d['x'][d['x'] % 3 == 0])
+
+
+def test_lazy(fpath):
+    d     = e1d.io.load_h5(fpath)
+    dl    = e1d.io.load_h5_lazy(fpath)
+    assert set(dl.keys()) == set(d.keys())
+    y     = dl['y']
+    assert (y.shape == d['y'].shape) and (y.dtype == d['y'].dtype) and (len(y) == 20)
+    assert np.array_equal(y[3:5, ::2], d['y'][3:5, ::2])
+    assert np.array_equal(np.asarray(y), d['y'])
+    assert np.array_equal(y.read(rows=[4, 0]), d['y'][[4, 0]])
+
+
+@pytest.mark.parametrize('kwargs', [dict(compression=None), dict(compression='lzf'), dict(compression_opts=1, shuffle=True, chunks=(5, 11)), dict(compression='gzip', compression_opts=0)])
+def test_compression(tmp_path, kwargs):
+    import h5py
+    d     = dict(y=np.random.default_rng(1).standard_normal((20, 11)), s=np.float64(1))
+    fpath = str(tmp_path / 'data.h5')
+    e1d.io.save_h5(fpath, d, **kwargs)
+    e1d.io.save_h5_item(fpath, 'z', d['y'], **kwargs)
+    d1    = e1d.io.load_h5(fpath)
+    assert np.array_equal(d1['y'], d['y']) and np.array_equal(d1['z'], d['y']) and (d1['s'] == 1)
+    with h5py.File(fpath, 'r') as f:
+        for k in ('y', 'z'):
+            assert f[k].compression == kwargs.get('compression', 'gzip')
+            assert f[k].compression_opts == ( kwargs.get('compression_opts', 9) if (f[k].compression == 'gzip') else None )
+            assert f[k].shuffle == kwargs.get('shuffle', False)
+
+
+
+_arff = """% comment
+@RELATION test
+@ATTRIBUTE t0 NUMERIC
+@ATTRIBUTE t1 NUMERIC
+@ATTRIBUTE subj_class { S1, S2 }
+@ATTRIBUTE trial_class { T01, T02 }
+
+@DATA
+1.5,2.5,S1,T01
+-1,1e-3,S2,T02
+3,NaN,S1,T02
+4,5,?,?
+"""
+
+def _write_arff(tmp_path, fname):
+    fpath = str(tmp_path / fname)
+    with open(fpath, 'w') as f:
+        f.write(_arff)
+    return fpath
+
+def test_read_arff(tmp_path):
+    fpath = _write_arff(tmp_path, 'test.arff')
+    d     = e1d.io.read_arff(fpath)
+    assert np.array_equal(d['y'], [[1.5, 2.5], [-1, 1e-3]])
+    assert list(d['subj_class']) == ['S1', 'S2']
+    d     = e1d.io.read_arff(fpath, dropna=False)
+    assert d['y'].shape == (4, 2) and np.isnan(d['y'][2,1])
+    assert d['trial_class'][3] == '?'
+    d     = e1d.io.read_arff(fpath, converters=dict(trial_class=lambda s: int(s[1:])))
+    assert d['trial_class'].dtype.kind == 'i'
+    assert list(d['trial_class']) == [1, 2]
+
+def test_read_arff_multiple(tmp_path):
+    fpaths = [_write_arff(tmp_path, f'test{i}.arff')  for i in range(3)]
+    ds0    = e1d.io.read_arff(fpaths)
+    ds1    = e1d.io.read_arff(fpaths, nworkers=2)
+    assert len(ds1) == 3
+    for d0,d1 in zip(ds0, ds1):
+        assert np.array_equal(d0['y'], d1['y']) and np.array_equal(d0['trial_class'], d1['trial_class'])
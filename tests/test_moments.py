@@ -0,0 +1,39 @@
+
+'''
+Ensure that fused moments (d, t, v and normalized residuals) are identical
+to those calculated separately using d_1sample, d_2sample, d2t and
+explicitly calculated residuals.
+'''
+
+
+import pytest
+import numpy as np
+import esrot1d as e1d
+
+
+
+def test_moments_1sample():
+    y        = np.random.default_rng(0).standard_normal((12, 51)).cumsum(axis=1) + 0.5
+    d,t,v    = e1d.stats.moments_1sample(y, mu=0.2)
+    assert np.allclose(d, e1d.stats.d_1sample(y, mu=0.2), rtol=1e-12)
+    assert np.allclose(t, e1d.stats.d2t(d, 12), rtol=1e-12)
+    assert v == 11
+    out      = np.empty(y.shape)
+    d,t,v,e  = e1d.stats.moments_1sample(y, out=out)
+    assert e is out
+    r        = y - y.mean(axis=0)
+    assert np.allclose(e, r / (r**2).sum(axis=0)**0.5, rtol=1e-12)
+    assert e1d.smoothness.estimate_lkc(e) == pytest.approx( e1d.smoothness.estimate_lkc(r), rel=1e-12 )
+
+
+def test_moments_2sample():
+    rng      = np.random.default_rng(1)
+    y0,y1    = rng.standard_normal((8, 51)), rng.standard_normal((13, 51))
+    d,t,v,e  = e1d.stats.moments_2sample(y0, y1, residuals=True)
+    assert np.allclose(d, e1d.stats.d_2sample(y0, y1), rtol=1e-12)
+    assert np.allclose(t, d / (1/8 + 1/13)**0.5, rtol=1e-12)
+    assert (v, e.shape) == (19, (21, 51))
+    r        = np.vstack( [y0 - y0.mean(axis=0), y1 - y1.mean(axis=0)] )
+    assert e1d.smoothness.estimate_lkc(e) == pytest.approx( e1d.smoothness.estimate_lkc(r), rel=1e-12 )
+    d1,t1,v1 = e1d.stats.moments_2sample(y0.T, y1.T, axis=1)
+    assert np.allclose(d1, d, rtol=1e-12)
@@ -0,0 +1,64 @@
+
+'''
+Ensure that vectorized minimum sample sizes (n_min) are identical
+to those found by incrementing n until d2p(d, n) <= alpha.
+'''
+
+
+import pytest
+import numpy as np
+import esrot1d as e1d
+
+
+
+def _n_min_loop(d, alpha, dim=0, Q=None, fwhm=None, design='1sample'):
+    n,dn = (4, 2) if (design=='2sample') else (2, 1)
+    while e1d.stats.d2p(d, n, dim=dim, Q=Q, fwhm=fwhm, design=design) > alpha:
+        n += dn
+    return n
+
+
+def test_n_min():
+    d      = np.array([0.3, 0.5, 0.8, 1.2, 2.0])
+    alpha  = np.array([0.05, 0.01])
+    for design in ['1sample', '2sample']:
+        for dim,Q,fwhm in [(0, None, None), (1, 101, 21.9)]:
+            n  = e1d.stats.n_min(d[:,None], alpha, dim=dim, Q=Q, fwhm=fwhm, design=design)
+            assert n.shape == (5, 2)
+            for i,dd in enumerate(d):
+                for j,aa in enumerate(alpha):
+                    assert n[i,j] == _n_min_loop(dd, aa, dim=dim, Q=Q, fwhm=fwhm, design=design)
+
+
+def test_n_min_groups():
+    n,n0,n1 = e1d.stats.n_min(0.8, design='2sample', ratio=2, return_groups=True)
+    assert (n == n0 + n1) and (n1 == 2 * n0)
+    t       = 0.8 / (1/n0 + 1/n1)**0.5
+    assert e1d.stats.t2p(t, n-2) <= 0.05
+    t       = 0.8 / (1/(n0-1) + 1/(2*n0-2))**0.5
+    assert e1d.stats.t2p(t, n-5) > 0.05
+    assert e1d.stats.n_min(0.8, design='2sample') == 20
+
+
+def test_n_min_single_group0():
+    # with ratio > 1 a smaller group of size one (n0=1) is valid and must be searched
+    n,n0,n1 = e1d.stats.n_min(20, design='2sample', ratio=3, return_groups=True)
+    assert (n, n0, n1) == (4, 1, 3)
+    assert e1d.stats.t2p(20 / (1 + 1/3)**0.5, 2) <= 0.05
+
+
+def test_n_min_errors():
+    with pytest.raises(ValueError):
+        e1d.stats.n_min(-0.5)
+    with pytest.raises(ValueError):
+        e1d.stats.n_min(0.5, design='3sample')
+    with pytest.raises(ValueError):
+        e1d.stats.n_min(0.001, nmax=100)
+    with pytest.raises(ValueError):
+        e1d.stats.n_min(0.5, design='1sample', ratio=2)
+    with pytest.raises(ValueError):
+        e1d.stats.n_min(0.5, dim=1, fwhm=20)
+    with pytest.raises(ValueError):
+        e1d.stats.n_min(0.5, dim=1, Q=101)
+    with pytest.raises(ValueError):
+        e1d.stats.n_min(0.5, dim=1, Q=101, fwhm=[20, None])
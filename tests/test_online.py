@@ -0,0 +1,40 @@
+
+'''
+Ensure that streaming (online) d-value calculations agree with
+d_1sample and d_2sample for chunked and merged data.
+'''
+
+
+import pytest
+import numpy as np
+import esrot1d as e1d
+
+
+rng  = np.random.default_rng(0)
+y0   = 1e6 + rng.standard_normal( (37, 101) )   # large offset:  check numerical stability
+y1   = 1e6 + 0.3 + rng.standard_normal( (23, 101) )
+
+
+
+def test_1sample():
+    acc  = e1d.stats.D1SampleAccumulator(mu=1e6)
+    for i in range(0, 37, 5):
+        acc.update( y0[i:i+5] )
+    assert acc.n == 37
+    assert acc.d == pytest.approx( e1d.stats.d_1sample(y0, mu=1e6), abs=1e-8 )
+
+
+def test_1sample_0d():
+    acc  = e1d.stats.D1SampleAccumulator()
+    acc.update( y1[:10,0] ).update( y1[10:,0] )
+    assert isinstance(acc.d, float)
+    assert acc.d == pytest.approx( e1d.stats.d_1sample(y1[:,0]) )
+
+
+def test_2sample_merge():
+    a    = e1d.stats.D2SampleAccumulator().update( y0[:20], y1[:3] )
+    b    = e1d.stats.D2SampleAccumulator().update( y0[20:] ).update( y1=y1[3:] )
+    acc  = a.copy().merge( b )
+    assert (acc.n0, acc.n1) == (37, 23)
+    assert a.n == 23
+    assert acc.d == pytest.approx( e1d.stats.d_2sample(y0, y1), abs=1e-8 )
@@ -0,0 +1,55 @@
+
+'''
+Ensure that batched permutation d-max values are identical to those
+calculated separately for each permutation, that small samples are
+enumerated exhaustively, and that nonparametric critical values are
+consistent with the parametric (RFT) ones for smooth Gaussian data.
+'''
+
+
+import pytest
+import numpy as np
+import esrot1d as e1d
+
+
+
+def test_exhaustive():
+    y      = np.random.default_rng(0).standard_normal((6, 11)) + 0.2
+    x      = e1d.perm.dmax_1sample(y)
+    assert x.size == 2**6
+    signs  = 1 - 2 * (np.arange(64)[:,None] >> np.arange(6) & 1)
+    x0     = [e1d.stats.d_1sample(s[:,None] * y).max()  for s in signs]
+    assert np.allclose(x, x0, rtol=1e-12)
+    x      = e1d.perm.dmax_2sample(y[:3], y[3:])
+    assert x.size == 20
+    assert x[0] == pytest.approx( e1d.stats.d_2sample(y[:3], y[3:]).max(), rel=1e-12 )
+
+
+def test_offset():
+    # large offsets relative to the spread must not cause cancellation
+    y      = np.random.default_rng(4).standard_normal((9, 21)) + 0.3
+    x0     = e1d.perm.dmax_1sample(y, niter=500)
+    x1     = e1d.perm.dmax_1sample(y + 1e8, mu=1e8, niter=500)
+    assert np.allclose(x0, x1, rtol=1e-6)
+    signs  = 1 - 2 * (np.arange(2**9)[:,None] >> np.arange(9) & 1)
+    x      = e1d.perm.dmax_1sample(y + 1e8)
+    x0     = [e1d.stats.d_1sample(s[:,None] * (y + 1e8)).max()  for s in signs]
+    assert np.allclose(x, x0, rtol=1e-8)
+
+
+def test_random():
+    y0     = e1d.sim.randn1d(10, 101, 20, rng=2)
+    y1     = e1d.sim.randn1d(10, 101, 20, rng=3)
+    x0     = e1d.perm.dmax_2sample(y0, y1, niter=2500, chunksize=1000)
+    x1     = e1d.perm.dmax_2sample(y0, y1, niter=2500, chunksize=1000, nworkers=2)
+    assert x0.size == 2500
+    assert np.all( x0 == x1 )
+    assert x0[0] == pytest.approx( e1d.stats.d_2sample(y0, y1).max(), rel=1e-12 )
+
+
+def test_d_critical():
+    y      = e1d.sim.randn1d(20, 101, 20, rng=1)
+    cv     = e1d.perm.d_critical(y, niter=10000)
+    cv0    = e1d.stats.d_critical(20, dim=1, Q=101, fwhm=20)
+    assert cv.labels == cv0.labels
+    assert np.allclose(cv.d[:-1], cv0.d[:-1], rtol=0.05)
@@ -0,0 +1,96 @@
+
+'''
+Ensure that analysis objects return the same results as the individual
+esrot1d functions, cache their intermediate results, and can be saved
+to and loaded from HDF5 files.
+'''
+
+
+import pytest
+import numpy as np
+import esrot1d as e1d
+
+
+
+def test_analysis_1d():
+    y     = e1d.sim.randn1d(30, 101, 25, rng=0) + 0.3
+    a     = e1d.analyze(y)
+    assert np.allclose(a.d, e1d.stats.d_1sample(y), rtol=1e-12)
+    assert a.fwhm == pytest.approx( e1d.smoothness.estimate_fwhm(y - y.mean(axis=0)), rel=1e-12 )
+    cv    = a.d_critical()
+    assert a.d_critical() is cv
+    assert np.allclose(cv.d, e1d.stats.d_critical(30, dim=1, Q=101, fwhm=a.fwhm, cache=False).d, rtol=1e-12)
+    i     = a.interpret()
+    assert i.shape == (101,)
+    assert np.all( (a.d < cv['Very small']) == (i == '') )
+    assert a.interpret(dmax=True) in cv.labels
+
+
+def test_analysis_2sample_0d():
+    rng   = np.random.default_rng(1)
+    y0,y1 = rng.standard_normal(10) + 1, rng.standard_normal(12)
+    a     = e1d.analyze(y0, y1)
+    assert (a.design, a.dim, a.n, a.v) == ('2sample', 0, 22, 20)
+    assert a.d == pytest.approx( e1d.stats.d_2sample(y0, y1), rel=1e-12 )
+    t     = e1d.stats.p2t(e1d.BaselineScenario().p, 20)
+    assert a.d_critical().d == pytest.approx( t * (1/10 + 1/12)**0.5, rel=1e-12 )
+    assert np.all( a.d_critical(n=22).d == e1d.stats.d_critical(22, design='2sample', cache=False).d )
+    with pytest.raises(ValueError):
+        a.fwhm
+
+
+def test_analysis_unequal_groups(tmp_path):
+    rng   = np.random.default_rng(2)
+    y0,y1 = rng.standard_normal((10, 101)) + 0.5, rng.standard_normal((11, 101))
+    a     = e1d.analyze(y0, y1)
+    cv    = a.d_critical(fwhm=20)
+    t     = e1d.stats.p2t(e1d.BaselineScenario().p, 19, dim=1, Q=101, fwhm=20)
+    assert cv.d == pytest.approx( t * (1/10 + 1/11)**0.5, rel=1e-12 )
+    assert a.interpret(fwhm=20, dmax=True) in ('',) + tuple(cv.labels)
+    a.d_critical(fwhm=20, n=22)
+    fpath = tmp_path / 'analysis.h5'
+    a.save(fpath)
+    a1    = e1d.pipeline.Analysis.load(fpath)
+    assert a1._critical.keys() == a._critical.keys()
+    assert np.all( a1.d_critical(fwhm=20).d == cv.d )
+
+
+def test_analysis_h5(tmp_path):
+    fpath = tmp_path / 'analysis.h5'
+    y     = e1d.sim.randn1d(20, 51, 10, rng=2) + 0.2
+    a     = e1d.analyze(y)
+    bl    = e1d.BaselineScenario.custom([0.2, 0.5, 0.8], [0.3, 0.1, 0.02], ['S', 'M', 'L'])
+    cv0   = a.d_critical()
+    cv1   = a.d_critical(n=40, design='2sample', baseline=bl)
+    a.save(fpath)
+    b     = e1d.pipeline.Analysis.load(fpath)
+    assert np.all( b.y0 == y )
+    assert (b.fwhm == a.fwhm) and np.all( b.d == a.d )
+    assert b.d_critical() == cv0
+    assert b.d_critical(n=40, design='2sample', baseline=bl).labels == ('S', 'M', 'L')
+    assert len(b._critical) == 2
+
+
+def test_analysis_h5_inf(tmp_path):
+    # infinitely smooth fields (fwhm=inf) and non-integer sample sizes must survive a round trip
+    fpath = tmp_path / 'analysis.h5'
+    a     = e1d.analyze( e1d.sim.randn1d(12, 51, 10, rng=3) + 0.2 )
+    cv0   = a.d_critical(fwhm=np.inf)
+    cv1   = a.d_critical(n=12.5, dim=0)
+    a.save(fpath)
+    b     = e1d.pipeline.Analysis.load(fpath)
+    assert set(b._critical) == set(a._critical)
+    assert b.d_critical(fwhm=np.inf) == cv0
+    assert b.d_critical(n=12.5, dim=0) == cv1
+
+
+def test_analysis_errors():
+    with pytest.raises(ValueError):
+        e1d.analyze(np.zeros((5, 11)), np.zeros((6, 11)), mu=1)
+
+
+def test_interpret_boundary():
+    a     = e1d.analyze( np.array([0.1, 0.5, 0.9, 1.3]) )
+    cv    = a.d_critical()
+    a._cache['d'] = cv['Large']   # exactly at a critical value:  "Large" is not exceeded
+    assert a.interpret() == 'Medium'
@@ -0,0 +1,66 @@
+
+'''
+Ensure that the built-in 1D random field theory (RFT) survival
+function and its inverse agree with rft1d for a variety of
+thresholds, degrees of freedom, field sizes and smoothness values.
+'''
+
+
+import pytest
+import numpy as np
+import esrot1d as e1d
+rft1d = pytest.importorskip('rft1d')
+
+
+# v,Q,fwhm
+scenarios = [
+    (5, 101, 20),
+    (8, 101, 5),
+    (18, 101, 50),
+    (38, 51, 10.5),
+    (18, 201, 100),
+]
+u = np.array([-1, 0, 0.5, 1, 2, 3, 4, 5])
+p = np.array([0.5, 0.2, 0.05, 0.01, 0.001])
+
+
+
+def test_t2p():
+    for (v,Q,fwhm) in scenarios:
+        p0  = rft1d.t.sf(u, v, Q, fwhm)
+        p1  = e1d.stats.t2p(u, v, dim=1, Q=Q, fwhm=fwhm)
+        assert p1 == pytest.approx(p0, rel=1e-9)
+
+
+def test_p2t():
+    for (v,Q,fwhm) in scenarios:
+        t0  = rft1d.t.isf(p, v, Q, fwhm)
+        t1  = e1d.stats.p2t(p, v, dim=1, Q=Q, fwhm=fwhm)
+        assert t1 == pytest.approx(t0, rel=1e-6)
+
+
+def test_t2p_broadcast():
+    v,Q,fwhm = np.array(scenarios).T
+    p1  = e1d.stats.t2p(2.5, v, dim=1, Q=Q, fwhm=fwhm)
+    p0  = [rft1d.t.sf(2.5, vv, int(qq), ww)  for vv,qq,ww in scenarios]
+    assert p1 == pytest.approx(p0, rel=1e-9)
+
+
+def test_p2t_grid_roundtrip():
+    from esrot1d.stats.p import _t_sf_1d
+    v   = np.arange(2, 202, 2)[:,None]
+    w   = np.linspace(2, 100, 40)
+    t   = e1d.stats.p2t(0.05, v, dim=1, Q=101, fwhm=w)
+    assert t.shape == (100, 40)
+    assert _t_sf_1d(t, v, 101, w) == pytest.approx(0.05, rel=1e-10)
+
+
+def test_p2t_boundaries():
+    t   = e1d.stats.p2t([0.0, 1.0, 0.05], 8, dim=1, Q=101, fwhm=20)
+    assert t[0] == np.inf
+    assert t[1] == -np.inf
+    assert t[2] == pytest.approx( rft1d.t.isf(0.05, 8, 101, 20), rel=1e-6 )
+    assert e1d.stats.p2t(0.0, 8, dim=1, Q=101, fwhm=20) == np.inf
+    assert np.isnan( e1d.stats.p2t(1.5, 8, dim=1, Q=101, fwhm=20) )
+    d   = e1d.stats.p2d([0.0, 1.0], 10, dim=1, Q=101, fwhm=20, method='exact')
+    assert list(d) == [np.inf, -np.inf]
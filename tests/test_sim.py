@@ -0,0 +1,94 @@
+
+'''
+Ensure that batched simulations of d-values and d-maxima are reproducible,
+independent of the batch size, and consistent with the analytical
+survival functions, and that empirical survival functions are correct.
+'''
+
+
+import pytest
+import numpy as np
+import esrot1d as e1d
+
+
+
+def test_reproducible():
+    for dim in (0, 1):
+        x0 = e1d.sim.dmax(500, 10, design='2sample', dim=dim, rng=3)
+        x1 = e1d.sim.dmax(500, 10, design='2sample', dim=dim, rng=3, max_bytes=8*10*101*7)
+        assert x0.shape == (500,)
+        assert np.all( x0 == x1 )
+
+
+def test_max_bytes():
+    import tracemalloc
+    max_bytes = 2**22
+    for dim,fwhm,pad in [(0,20,False), (1,20,False), (1,20,True), (1,5,True), (1,0,False)]:
+        e1d.sim.dmax(10, 10, dim=dim, fwhm=fwhm, pad=pad, rng=0, max_bytes=max_bytes)   # (kernel cache)
+        tracemalloc.start()
+        e1d.sim.dmax(2000, 10, dim=dim, fwhm=fwhm, pad=pad, rng=0, max_bytes=max_bytes)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert peak < 1.5 * max_bytes
+
+
+def test_sf():
+    u  = np.array([1.0, 1.2])
+    for dim,design,n in [(0,'1sample',10), (1,'1sample',10), (0,'2sample',20), (1,'2sample',20)]:
+        x  = e1d.sim.dmax(5000, n, design=design, dim=dim, Q=101, fwhm=20, rng=0)
+        p0 = e1d.stats.d2p(u, n, dim=dim, design=design, Q=101, fwhm=20)
+        p1 = e1d.sim.empirical_sf(x, u)
+        assert p1 == pytest.approx(p0, abs=0.015)
+
+
+def test_empirical_sf():
+    x     = np.random.default_rng(0).standard_normal(1000).round(1)   # includes ties
+    u     = np.linspace(-4, 4, 81)
+    sf    = e1d.sim.empirical_sf(x, u)
+    assert np.array_equal(sf, [(x > uu).mean()  for uu in u])
+    sf,lo,hi = e1d.sim.empirical_sf(x, u, ci=True, alpha=0.05)
+    assert np.all(lo <= sf) and np.all(sf <= hi)
+    assert (lo[0], hi[-1]) == (pytest.approx(0.025**(1/1000)), pytest.approx(1 - 0.025**(1/1000)))   # k=n and k=0
+
+
+def test_2sample_n():
+    with pytest.raises(ValueError):
+        e1d.sim.dmax(10, 9, design='2sample')
+
+
+def test_run_scenarios(tmp_path):
+    scenarios = [dict(niter=250, n=10, design='2sample', dim=1, Q=51, fwhm=10), dict(niter=120, n=8, design='1sample', dim=0)]
+    x0    = e1d.sim.run_scenarios(scenarios, seed=1, chunksize=100)
+    x1    = e1d.sim.run_scenarios(scenarios, seed=1, chunksize=100, nworkers=2)
+    assert [x.shape for x in x0] == [(250,), (120,)]
+    assert all( np.all(a==b)  for a,b in zip(x0,x1) )
+    # resume from a partial checkpoint:
+    fpath = tmp_path / 'checkpoint.h5'
+    e1d.sim.run_scenarios(scenarios[:1], seed=1, chunksize=100, fpath=fpath)
+    with pytest.raises(ValueError):
+        e1d.sim.run_scenarios(scenarios, seed=1, chunksize=100, fpath=fpath)
+    fpath = tmp_path / 'checkpoint2.h5'
+    e1d.sim.run_scenarios(scenarios, seed=1, chunksize=100, fpath=fpath)
+    e1d.io.save_h5_item(fpath, 'scenario0000_chunk00001', np.zeros(100))  # modify one chunk to check that stored chunks are reused
+    x2    = e1d.sim.run_scenarios(scenarios, seed=1, chunksize=100, fpath=fpath)
+    assert np.all( x2[0][100:200] == 0 )
+    assert np.all( x2[1] == x0[1] )
+
+
+def test_randn1d():
+    from scipy.ndimage import gaussian_filter1d
+    Q,fwhm = 101, 20
+    y0     = np.random.default_rng(5).standard_normal((4, Q))
+    sd     = fwhm / (8*np.log(2))**0.5
+    k      = gaussian_filter1d(np.eye(Q)[0], sd, mode='wrap')
+    y0     = gaussian_filter1d(y0, sd, axis=1, mode='wrap') / (k**2).sum()**0.5
+    out    = np.empty((2, 2, Q))
+    y1     = e1d.sim.randn1d((2, 2), Q, fwhm, rng=np.random.default_rng(5), out=out)
+    assert y1 is out
+    assert np.allclose(y1.reshape(4, Q), y0, atol=1e-12)
+    for pad in (False, True):
+        y  = e1d.sim.randn1d(4000, Q, fwhm, pad=pad, rng=0)
+        assert y.var() == pytest.approx(1, abs=0.05)
+        assert e1d.smoothness.estimate_fwhm(y - y.mean(axis=0)) == pytest.approx(fwhm, rel=0.05)
+    with pytest.raises(ValueError):
+        e1d.sim.randn1d(3, Q, fwhm, out=np.empty((3, Q+1)))
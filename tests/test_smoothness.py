@@ -0,0 +1,43 @@
+
+'''
+Ensure that batched and chunked smoothness estimates are identical
+to estimates calculated separately for each (full) dataset.
+'''
+
+
+import pytest
+import numpy as np
+import esrot1d as e1d
+
+
+
+def _lkc_reference(e):   # Taylor & Worsley (2007) Eqns.4-6, explicit
+    u   = e / (e**2).sum(axis=0)**0.5
+    d   = np.diff(u, axis=1)
+    return (  (d**2).sum(axis=0)**0.5  ).sum()
+
+
+def test_batched():
+    e     = np.random.default_rng(0).standard_normal((3, 4, 8, 51)).cumsum(axis=-1)
+    lkc0  = np.array([[_lkc_reference(x) for x in ee] for ee in e])
+    lkc   = e1d.smoothness.estimate_lkc(e)
+    assert lkc.shape == (3, 4)
+    assert np.allclose(lkc, lkc0, rtol=1e-12)
+    assert e1d.smoothness.estimate_lkc(e[1,2]) == pytest.approx(lkc0[1,2], rel=1e-12)
+    out   = np.empty((3, 4))
+    fwhm  = e1d.smoothness.estimate_fwhm(e.copy(), out=out, overwrite=True)
+    assert fwhm is out
+    assert np.allclose(fwhm, e1d.smoothness.lkc2fwhm(lkc0, 51), rtol=1e-12)
+
+
+@pytest.mark.parametrize('chunksize', [1, 5, 50, 1000])
+def test_chunked(tmp_path, chunksize):
+    e     = np.random.default_rng(1).standard_normal((2, 8, 101)).cumsum(axis=-1)
+    lkc0  = e1d.smoothness.estimate_lkc(e)
+    lkc   = e1d.smoothness.estimate_lkc(e, chunksize=chunksize)
+    assert np.allclose(lkc, lkc0, rtol=1e-12)
+    fpath = str(tmp_path / 'e.npy')
+    np.save(fpath, e)
+    m     = np.load(fpath, mmap_mode='r')
+    assert e1d.smoothness.estimate_fwhm(m[0], chunksize=chunksize) == pytest.approx(e1d.smoothness.estimate_fwhm(e[0]), rel=1e-12)
+    assert np.array_equal(m, e)   # input unchanged
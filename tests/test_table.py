@@ -0,0 +1,75 @@
+
+'''
+Ensure that the precomputed critical-threshold table (method='table')
+agrees with the exact calculations to within its documented error bound,
+and that it falls back to the exact calculations outside the table's grid.
+'''
+
+
+import pytest
+import numpy as np
+import esrot1d as e1d
+
+
+
+def _rel_error(p, v, resels):
+    from esrot1d.stats.p import _p2t_1d
+    t0   = _p2t_1d(p, v, resels + 1, 1, method='exact')
+    t1   = _p2t_1d(p, v, resels + 1, 1, method='table')
+    return np.abs(t1 - t0) / (1 + np.abs(t0))
+
+
+def test_table_error_bound():
+    rng  = np.random.default_rng(0)
+    m    = 20000
+    v    = np.exp( rng.uniform(np.log(4), np.log(1000), m) )
+    r    = np.exp( rng.uniform(np.log(0.1), np.log(1000), m) )
+    p    = np.exp( rng.uniform(np.log(1e-6), np.log(0.5), m) )
+    e    = _rel_error(p, v, r)
+    assert e.max() < 0.03
+    assert np.quantile(e, 0.99) < 0.005
+    assert e[p <= 0.1].max() < 0.015
+    # worst-case region (p close to 0.5, few resels):  the bound is nearly attained
+    v    = np.exp( rng.uniform(np.log(4), np.log(1000), m) )
+    r    = np.exp( rng.uniform(np.log(0.1), np.log(1.5), m) )
+    p    = rng.uniform(0.45, 0.5, m)
+    e    = _rel_error(p, v, r)
+    assert 0.02 < e.max() < 0.03
+
+
+def test_table_monotonic():
+    from esrot1d.stats.p import _p2t_1d
+    p    = np.geomspace(1e-6, 0.5, 200)
+    v    = np.geomspace(4, 1000, 200)
+    r    = np.geomspace(0.1, 1000, 200)
+    for axis,(pp,vv,rr) in enumerate( [(p, v[::20], r[::20]), (p[::20], v, r[::20]), (p[::20], v[::20], r)] ):
+        P,V,R = np.meshgrid(pp, vv, rr, indexing='ij')
+        dt    = np.diff( _p2t_1d(P, V, R + 1, 1, method='table'), axis=axis )
+        assert np.all( dt >= 0 ) if (axis == 2) else np.all( dt <= 0 )
+
+
+def test_table_fallback():
+    p    = [0.6, 1e-7]
+    t0   = e1d.stats.p2t(p, 10, dim=1, Q=101, fwhm=20)
+    t1   = e1d.stats.p2t(p, 10, dim=1, Q=101, fwhm=20, method='table')
+    assert t1 == pytest.approx(t0, rel=1e-12)
+    t0   = e1d.stats.p2t(0.05, 2, dim=1, Q=101, fwhm=20)
+    t1   = e1d.stats.p2t(0.05, 2, dim=1, Q=101, fwhm=20, method='table')
+    assert t1 == pytest.approx(t0, rel=1e-12)
+
+
+def test_table_d_critical():
+    cv0  = e1d.stats.d_critical(20, dim=1, design='2sample', Q=101, fwhm=21.9)
+    cv1  = e1d.stats.d_critical(20, dim=1, design='2sample', Q=101, fwhm=21.9, method='table')
+    assert cv1.toarray() == pytest.approx(cv0.toarray(), rel=0.03, abs=0.03)
+    with pytest.raises(ValueError):
+        e1d.stats.p2d(0.05, 20, dim=1, Q=101, fwhm=20, method='spline')
+
+
+def test_table_0d():
+    with pytest.raises(ValueError):
+        e1d.stats.p2t(0.05, 10, dim=0, method='table')
+    with pytest.raises(ValueError):
+        e1d.stats.p2d(0.05, 20, dim=0, method='table')
+    with pytest.raises(ValueError):
+        e1d.stats.d_critical(20, dim=0, method='table', cache=False)
@@ -0,0 +1,57 @@
+
+'''
+Ensure that the SciPy-free t distribution functions agree with
+scipy.stats.t to within 1e-12 (relative), and that probability
+conversions are unchanged when SciPy is not used.
+'''
+
+
+import pytest
+import numpy as np
+import esrot1d as e1d
+from esrot1d.stats import tdist
+stats = pytest.importorskip('scipy.stats')
+
+
+v    = np.array([1, 2, 3, 4.5, 9, 19, 38, 98, 998, 9998])[:,None]
+
+
+
+def test_sf():
+    t    = np.concatenate( [-np.geomspace(1e-3, 1e3, 20)[::-1], [0], np.geomspace(1e-3, 1e6, 60)] )
+    p0   = stats.t.sf(t, v)
+    p    = tdist._sf(t, v)
+    b    = p0 > 1e-300
+    assert np.allclose(p[b], p0[b], rtol=1e-12, atol=0)
+    vv   = v[:-1]    # scipy.stats.t.pdf is itself less accurate for very large v
+    assert np.allclose(tdist.pdf(t, vv), stats.t.pdf(t, vv), rtol=1e-12, atol=0)
+    assert np.array_equal( tdist._sf([np.inf, -np.inf, 0], 5), [0, 1, 0.5] )
+
+
+def test_isf():
+    p    = np.concatenate( [np.geomspace(1e-150, 0.49, 80), [0.5], np.linspace(0.51, 0.999, 20)] )
+    t0   = stats.t.isf(p, v)
+    t    = tdist._isf(p, v)
+    assert np.allclose(t, t0, rtol=1e-12, atol=1e-14)
+    assert np.array_equal( tdist._isf([0, 1, 0.5], 5), [np.inf, -np.inf, 0] )
+
+
+def test_isf_boundaries():
+    p    = np.array([0, 0.5, 1, 1e-200, 1e-300, 1 - 1e-12])
+    t0   = tdist._isf(p, v)
+    t1   = tdist.isf(p, v)
+    assert np.array_equal( t1[:,:3], np.broadcast_to([np.inf, 0, -np.inf], (v.size, 3)) )
+    assert np.array_equal( t0[:,:3], t1[:,:3] )
+    assert np.allclose(t1[:,3:], t0[:,3:], rtol=1e-10, atol=0)
+    for dim in (0, 1):
+        assert e1d.stats.p2t(0.0, 8, dim=dim, Q=101, fwhm=20) == np.inf
+        assert e1d.stats.p2d(0.0, 8, dim=dim, Q=101, fwhm=20) == np.inf
+
+
+def test_no_scipy(monkeypatch):
+    d    = np.linspace(0, 2, 11)
+    p0   = e1d.stats.d2p(d, [8, 20], dim=1, Q=101, fwhm=20, design='2sample')
+    d0   = e1d.stats.p2d(0.05, [8, 20], dim=0)
+    monkeypatch.setattr(tdist, 'use_scipy', False)
+    assert np.allclose(e1d.stats.d2p(d, [8, 20], dim=1, Q=101, fwhm=20, design='2sample'), p0, rtol=1e-12, atol=0)
+    assert np.allclose(e1d.stats.p2d(0.05, [8, 20], dim=0), d0, rtol=1e-12, atol=0)
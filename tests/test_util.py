@@ -0,0 +1,34 @@
+
+'''
+Ensure that vectorized group means are identical to means
+calculated separately for each group.
+'''
+
+
+import pytest
+import numpy as np
+import esrot1d as e1d
+
+
+
+def test_group_means():
+    rng   = np.random.default_rng(0)
+    n     = 500
+    subj  = rng.integers(0, 40, n)
+    sess  = rng.integers(0, 2, n)
+    y     = rng.standard_normal((n, 11))
+    g     = e1d.util.group_means(y, dict(subj=subj, sess=sess), min_count=3, carry=dict(group=subj % 2))
+    i     = 0
+    for s0 in np.unique(subj):
+        for s1 in (0, 1):
+            b = (subj==s0) & (sess==s1)
+            if b.sum() >= 3:
+                assert (g['subj'][i], g['sess'][i], g['group'][i], g['count'][i]) == (s0, s1, s0 % 2, b.sum())
+                assert np.allclose(g['y'][i], y[b].mean(axis=0), rtol=0, atol=1e-12)
+                i += 1
+    assert i == g['y'].shape[0]
+
+
+def test_group_means_empty():
+    g     = e1d.util.group_means(np.zeros((0, 5)), dict(subj=np.zeros(0, dtype=int)))
+    assert g['y'].shape == (0, 5) and g['subj'].size == 0
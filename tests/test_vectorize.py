@@ -106,3 +106,20 @@ def test_t2p():
 
 
 
+
+
+def test_broadcast_scalar_agreement():
+    x   = e1d.stats.d2p(darray, narray, dim=0, design='2sample')
+    for i,n in enumerate(narray):
+        for j,d in enumerate(darray):
+            assert x[i,j] == pytest.approx( e1d.stats.d2p(d, n, dim=0, design='2sample') )
+
+
+def test_broadcast_Q_fwhm():
+    fwhms = np.array([5, 20, 50])
+    x     = e1d.stats.p2d(0.05, 20, dim=1, Q=Q, fwhm=fwhms)
+    assert isinstance(x, np.ndarray)
+    assert x.shape == (3,)
+    x     = e1d.stats.p2d(0.05, narray, dim=1, Q=Q, fwhm=fwhms[:,None])
+    assert x.shape == (3,3)
+    assert x[1,2] == pytest.approx( e1d.stats.p2d(0.05, narray[2], dim=1, Q=Q, fwhm=fwhms[1]) )